@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Per-host scan durations for the fleet scheduler.
+
+Under the linear strategy every task runs across the whole batch before the
+next one starts, so timing the compliance_check role from inside the play
+gives every host the batch's wall-clock time. This callback instead times
+each host's own tasks: from the moment a task is handed to a worker for the
+host until the host's result comes back.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+from ansible.plugins.callback import CallbackBase
+
+DOCUMENTATION = r'''
+---
+name: scan_durations
+type: aggregate
+short_description: Record per-host compliance scan durations
+description:
+    - Sums the time each host spends in the tasks of one compliance_check
+      role run (configuration acquisition, device commands and evaluation)
+    - Role runs that skip configuration acquisition, such as the
+      verification after remediation, are not recorded
+    - Hosts that fail or become unreachable during the run are not recorded
+    - Writes one JSON file per host when the playbook ends, read by
+      scripts/fleet_scheduler.py
+requirements:
+    - Enabled in ansible.cfg (callback_whitelist)
+options:
+    duration_dir:
+        description:
+            - Directory for the per-host files, defaults to
+              logs/scan_durations next to the playbook (group_vars log_dir)
+        env:
+            - name: SCAN_DURATION_DIR
+        ini:
+            - section: callback_scan_durations
+              key: duration_dir
+'''
+
+ROLE_NAME = 'compliance_check'
+
+# Tasks file whose tasks only run when the role fetches the config itself
+ACQUISITION_TASKS = 'acquire_config.yml'
+
+
+def task_file(task):
+    """Basename of the file a task is defined in"""
+    path = task.get_path() or ''
+    return os.path.basename(path.rsplit(':', 1)[0])
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'scan_durations'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super().__init__()
+        self.playbook_dir = None
+        # (hostname, task uuid) -> monotonic start
+        self.started = {}
+        # hostname -> current role run {'role', 'duration', 'acquired'}
+        self.runs = {}
+        # hostname -> duration of the last complete role run with acquisition
+        self.samples = {}
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook_dir = playbook._basedir
+
+    def v2_runner_on_start(self, host, task):
+        if task._role is not None and task._role.get_name() == ROLE_NAME:
+            self.started[(host.get_name(), task._uuid)] = time.monotonic()
+
+    def finish(self, result, failed=False):
+        """Add a finished task to its host's role run"""
+        task = result._task
+        hostname = result._host.get_name()
+        start = self.started.pop((hostname, task._uuid), None)
+        if start is None:
+            return
+
+        run = self.runs.get(hostname)
+        if run is None or run['role'] is not task._role:
+            run = self.runs[hostname] = {'role': task._role, 'duration': 0.0, 'acquired': False}
+        if failed:
+            run['acquired'] = False
+            self.samples.pop(hostname, None)
+            return
+
+        run['duration'] += time.monotonic() - start
+        if task_file(task) == ACQUISITION_TASKS:
+            run['acquired'] = True
+        if run['acquired']:
+            self.samples[hostname] = run['duration']
+
+    def v2_runner_on_ok(self, result):
+        self.finish(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.finish(result, failed=not ignore_errors)
+
+    def v2_runner_on_unreachable(self, result):
+        self.finish(result, failed=True)
+
+    def v2_runner_on_skipped(self, result):
+        self.started.pop((result._host.get_name(), result._task._uuid), None)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.samples:
+            return
+
+        duration_dir = self.get_option('duration_dir') or os.path.join(
+            self.playbook_dir or os.getcwd(), 'logs', 'scan_durations'
+        )
+        os.makedirs(duration_dir, exist_ok=True)
+        recorded = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+
+        for hostname, duration in self.samples.items():
+            sample = {'hostname': hostname, 'duration': round(duration, 3), 'recorded': recorded}
+            with open(os.path.join(duration_dir, f'{hostname}.json'), 'w') as f:
+                json.dump(sample, f)
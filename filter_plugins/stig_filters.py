@@ -2,10 +2,180 @@
 """
 Custom Ansible filter plugins for STIG compliance automation.
 These filters help process and analyze STIG compliance data.
+
+Ansible loads filter plugins in every worker process, so nothing is compiled
+at import time. Regexes are compiled on first use and kept in a bounded LRU
+keyed by pattern and flags; lookup tables are plain module constants.
 """
 
+import os
 import re
-from datetime import datetime
+import sys
+from functools import lru_cache
+
+REGEX_CACHE_SIZE = 512
+
+SEVERITY_ALIASES = {
+    'CAT_I': 'CAT_I', 'HIGH': 'CAT_I', 'I': 'CAT_I', '1': 'CAT_I',
+    'CAT_II': 'CAT_II', 'MEDIUM': 'CAT_II', 'II': 'CAT_II', '2': 'CAT_II',
+    'CAT_III': 'CAT_III', 'LOW': 'CAT_III', 'III': 'CAT_III', '3': 'CAT_III'
+}
+
+SEVERITY_NUMBERS = {'CAT_I': 1, 'CAT_II': 2, 'CAT_III': 3}
+NUMBER_SEVERITIES = {1: 'CAT_I', 2: 'CAT_II', 3: 'CAT_III'}
+SEVERITY_WEIGHTS = {'CAT_I': 3, 'CAT_II': 2, 'CAT_III': 1}
+
+IOS_COMMAND_STARTERS = frozenset([
+    'aaa', 'access-', 'banner', 'boot', 'cdp', 'class-map',
+    'clock', 'crypto', 'enable', 'hostname', 'interface',
+    'ip', 'ipv6', 'line', 'logging', 'login', 'mls', 'no',
+    'ntp', 'policy-map', 'router', 'service', 'snmp', 'spanning-tree',
+    'ssh', 'tacacs', 'transport', 'username', 'vlan', 'vty'
+])
+
+LEADING_BULLET_PATTERN = r'^[\d\.\)\-\*]+\s*'
+VERSION_PATTERN = r'Version (\S+)'
+MODEL_PATTERN = r'cisco (\S+)'
+UPTIME_PATTERN = r'uptime is (.+)'
+
+CONFIG_MATCH_FLAGS = re.IGNORECASE | re.MULTILINE
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def cached_regex(pattern, flags=0):
+    """Compile a regex once per process (bounded LRU keyed by pattern and flags)"""
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def config_line_regex(config_line):
+    """Regex matching a config line anywhere in a config, case-insensitive"""
+    return re.compile(re.escape(config_line.strip()).replace(r'\ +', r'\s+'), CONFIG_MATCH_FLAGS)
+
+
+@lru_cache(maxsize=REGEX_CACHE_SIZE)
+def negated_config_regex(base_config):
+    """Regex matching a line starting with base_config but not 'no base_config'"""
+    return re.compile(rf'^(?!no\s+){re.escape(base_config)}', CONFIG_MATCH_FLAGS)
+
+
+def _add_module_utils_path():
+    """Make the project's module_utils importable (imported lazily, on first use)"""
+    module_utils_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils')
+    if module_utils_dir not in sys.path:
+        sys.path.append(module_utils_dir)
+
+
+def load_rule_set(path):
+    """Compiled rule set for a path, reloaded when the file changes"""
+    _add_module_utils_path()
+    from stig_evaluator import load_rule_set as load_cached
+    return load_cached(path)
+
+
+def normalize_severity(severity):
+    """Map a severity alias (HIGH, I, 1, CAT I, ...) to CAT_I/CAT_II/CAT_III or None"""
+    return SEVERITY_ALIASES.get(str(severity).upper().replace(' ', '_'))
+
+
+def iter_config_lines(config):
+    """
+    Yield raw lines from configuration text without splitting it up front.
+
+    Accepts a string, a file object, or any iterable of lines.
+    """
+    if config is None:
+        return
+    if isinstance(config, str):
+        start = 0
+        length = len(config)
+        while start < length:
+            end = config.find('\n', start)
+            if end == -1:
+                end = length
+            yield config[start:end]
+            start = end + 1
+        return
+    for line in config:
+        yield line.rstrip('\n')
+
+
+def iter_config_tree(config):
+    """
+    Walk a configuration as a tree.
+
+    Skips blank and comment lines, normalizes whitespace, and tracks the
+    parent path from indentation.
+
+    Yields:
+        (parents, line) tuples where parents is a tuple of normalized
+        ancestor lines, shared between siblings
+    """
+    # Stack of (indent, path) where path includes the line itself
+    stack = []
+    for raw in iter_config_lines(config):
+        stripped = raw.strip()
+        if not stripped or stripped.startswith('!'):
+            continue
+
+        indent = len(raw) - len(raw.lstrip())
+        line = ' '.join(stripped.split())
+
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        parents = stack[-1][1] if stack else ()
+        stack.append((indent, parents + (line,)))
+
+        yield parents, line
+
+
+def _rewindable(config):
+    """Return a zero-argument callable producing fresh line iterators"""
+    if config is None or isinstance(config, str):
+        return lambda: iter_config_tree(config)
+    if hasattr(config, 'seek'):
+        def rewind():
+            config.seek(0)
+            return iter_config_tree(config)
+        return rewind
+    lines = list(config)
+    return lambda: iter_config_tree(lines)
+
+
+def iter_config_diff(current_config, desired_config):
+    """
+    Stream a hierarchy-aware diff between two configurations.
+
+    The set of (parents, line) keys of each config is held, so memory grows
+    with the number of distinct lines, but no list of unchanged lines is
+    built and callers can consume the diff one entry at a time. The current
+    config is read twice, so text, a seekable file or a re-iterable sequence
+    of lines works; any other iterable is buffered into a list.
+
+    Yields:
+        ('add' | 'unchanged', parents, line) in desired config order, then
+        ('remove', parents, line) in current config order
+    """
+    current = _rewindable(current_config)
+
+    current_keys = set()
+    for key in current():
+        current_keys.add(key)
+
+    desired_keys = set()
+    for key in iter_config_tree(desired_config):
+        if key in desired_keys:
+            continue
+        desired_keys.add(key)
+        yield ('unchanged' if key in current_keys else 'add'), key[0], key[1]
+
+    del current_keys
+    emitted = set()
+    for key in current():
+        if key in desired_keys or key in emitted:
+            continue
+        emitted.add(key)
+        yield 'remove', key[0], key[1]
 
 
 class FilterModule:
@@ -28,7 +198,12 @@ class FilterModule:
             'format_compliance_report': self.format_compliance_report,
             'group_by_severity': self.group_by_severity,
             'get_noncompliant_items': self.get_noncompliant_items,
-            'merge_compliance_results': self.merge_compliance_results
+            'merge_compliance_results': self.merge_compliance_results,
+            'expand_compliance_results': self.expand_compliance_results,
+            'device_results': self.device_results,
+            'remediation_plan_commands': self.remediation_plan_commands,
+            'render_remediation_blocks': self.render_remediation_blocks,
+            'remediation_push_blocks': self.remediation_push_blocks
         }
 
     def extract_config_lines(self, config_text, pattern=None, section=None):
@@ -52,7 +227,7 @@ class FilterModule:
         if section:
             # Extract entire section
             in_section = False
-            section_pattern = re.compile(rf'^{re.escape(section)}', re.IGNORECASE)
+            section_pattern = cached_regex(rf'^{re.escape(section)}', re.IGNORECASE)
 
             for line in lines:
                 if section_pattern.match(line):
@@ -69,7 +244,7 @@ class FilterModule:
 
         elif pattern:
             # Match by pattern
-            regex = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+            regex = cached_regex(pattern, CONFIG_MATCH_FLAGS)
             for line in lines:
                 if regex.search(line):
                     result.append(line.strip())
@@ -98,21 +273,20 @@ class FilterModule:
                 'found': []
             }
 
-        config_lower = config_text.lower()
+        # Normalized once for all expected lines
+        config_normalized = self._normalize_config_line(config_text).lower()
         missing = []
         found = []
 
         for expected in expected_configs:
             expected_normalized = self._normalize_config_line(expected)
-            config_normalized = self._normalize_config_line(config_text)
 
             # Check if the config exists (case-insensitive, whitespace-normalized)
-            if expected_normalized.lower() in config_normalized.lower():
+            if expected_normalized.lower() in config_normalized:
                 found.append(expected)
             else:
                 # Try regex match for more flexible matching
-                pattern = re.escape(expected.strip()).replace(r'\ +', r'\s+')
-                if re.search(pattern, config_text, re.IGNORECASE | re.MULTILINE):
+                if config_line_regex(expected).search(config_text):
                     found.append(expected)
                 else:
                     missing.append(expected)
@@ -149,15 +323,13 @@ class FilterModule:
             if prohibited.lower().startswith('no '):
                 # Looking for absence of "no X", which means X should not exist
                 base_config = prohibited[3:].strip()
-                pattern = rf'^(?!no\s+){re.escape(base_config)}'
-                if re.search(pattern, config_text, re.IGNORECASE | re.MULTILINE):
+                if negated_config_regex(base_config).search(config_text):
                     violations.append(f"Found '{base_config}' (should have 'no' prefix)")
                 else:
                     clean.append(prohibited)
             else:
                 # Looking for exact match to be absent
-                pattern = re.escape(prohibited.strip()).replace(r'\ +', r'\s+')
-                if re.search(pattern, config_text, re.IGNORECASE | re.MULTILINE):
+                if config_line_regex(prohibited).search(config_text):
                     violations.append(prohibited)
                 else:
                     clean.append(prohibited)
@@ -236,16 +408,8 @@ class FilterModule:
         if not severities:
             return items
 
-        # Normalize severity values
-        normalized = []
-        for s in severities:
-            s_upper = s.upper().replace(' ', '_')
-            if s_upper in ['CAT_I', 'HIGH', 'I', '1']:
-                normalized.append('CAT_I')
-            elif s_upper in ['CAT_II', 'MEDIUM', 'II', '2']:
-                normalized.append('CAT_II')
-            elif s_upper in ['CAT_III', 'LOW', 'III', '3']:
-                normalized.append('CAT_III')
+        normalized = {normalize_severity(s) for s in severities}
+        normalized.discard(None)
 
         return [item for item in items if item.get(key, '').upper() in normalized]
 
@@ -268,7 +432,7 @@ class FilterModule:
                 'breakdown': {}
             }
 
-        weights = {'CAT_I': 3, 'CAT_II': 2, 'CAT_III': 1}
+        weights = SEVERITY_WEIGHTS
 
         total_score = 0
         max_score = 0
@@ -315,13 +479,8 @@ class FilterModule:
             return []
 
         commands = []
-        command_starters = [
-            'aaa', 'access-', 'banner', 'boot', 'cdp', 'class-map',
-            'clock', 'crypto', 'enable', 'hostname', 'interface',
-            'ip', 'ipv6', 'line', 'logging', 'login', 'mls', 'no',
-            'ntp', 'policy-map', 'router', 'service', 'snmp', 'spanning-tree',
-            'ssh', 'tacacs', 'transport', 'username', 'vlan', 'vty'
-        ]
+        command_starters = IOS_COMMAND_STARTERS
+        bullet_regex = cached_regex(LEADING_BULLET_PATTERN)
 
         for line in text.split('\n'):
             line = line.strip()
@@ -337,7 +496,7 @@ class FilterModule:
                 # Clean up the command
                 cmd = line.strip()
                 # Remove leading bullets or numbers
-                cmd = re.sub(r'^[\d\.\)\-\*]+\s*', '', cmd)
+                cmd = bullet_regex.sub('', cmd)
                 if cmd and len(cmd) > 3:
                     commands.append(cmd)
 
@@ -386,15 +545,15 @@ class FilterModule:
         """Parse show version output"""
         result = {}
 
-        version_match = re.search(r'Version (\S+)', output)
+        version_match = cached_regex(VERSION_PATTERN).search(output)
         if version_match:
             result['version'] = version_match.group(1)
 
-        model_match = re.search(r'cisco (\S+)', output, re.IGNORECASE)
+        model_match = cached_regex(MODEL_PATTERN, re.IGNORECASE).search(output)
         if model_match:
             result['model'] = model_match.group(1)
 
-        uptime_match = re.search(r'uptime is (.+)', output, re.IGNORECASE)
+        uptime_match = cached_regex(UPTIME_PATTERN, re.IGNORECASE).search(output)
         if uptime_match:
             result['uptime'] = uptime_match.group(1).strip()
 
@@ -414,31 +573,50 @@ class FilterModule:
                     })
         return {'associations': associations}
 
-    def config_diff(self, current_config, desired_config):
+    def config_diff(self, current_config, desired_config, include_unchanged=False):
         """
-        Generate diff between current and desired configuration.
+        Generate a hierarchy-aware diff between current and desired configuration.
+
+        Lines are compared by their full parent path, so ' shutdown' under
+        two different interfaces are distinct lines. Output preserves config
+        order: 'add' follows the desired config, 'remove' the current config.
+        Unchanged lines are only counted unless requested.
+
+        Args:
+            current_config: Current configuration (text or iterable of lines)
+            desired_config: Desired configuration (text or iterable of lines)
+            include_unchanged: Also return lines present in both configs
 
         Returns:
-            Dict with 'add', 'remove', and 'modify' lists
+            Dict with 'add', 'remove' (and optionally 'unchanged') lists of
+            {'parents': [...], 'line': ...} entries, plus a 'summary' of counts
         """
-        current_lines = set(self.normalize_config(current_config).split('\n'))
-        desired_lines = set(self.normalize_config(desired_config).split('\n'))
-
-        return {
-            'add': list(desired_lines - current_lines),
-            'remove': list(current_lines - desired_lines),
-            'unchanged': list(current_lines & desired_lines)
+        result = {'add': [], 'remove': []}
+        if include_unchanged:
+            result['unchanged'] = []
+
+        unchanged_count = 0
+        for action, parents, line in iter_config_diff(current_config, desired_config):
+            if action == 'unchanged':
+                unchanged_count += 1
+                if not include_unchanged:
+                    continue
+            result[action].append({'parents': list(parents), 'line': line})
+
+        result['summary'] = {
+            'add': len(result['add']),
+            'remove': len(result['remove']),
+            'unchanged': unchanged_count
         }
+        return result
 
     def severity_to_number(self, severity):
         """Convert severity category to number (for sorting)"""
-        mapping = {'CAT_I': 1, 'CAT_II': 2, 'CAT_III': 3}
-        return mapping.get(severity.upper().replace(' ', '_'), 99)
+        return SEVERITY_NUMBERS.get(severity.upper().replace(' ', '_'), 99)
 
     def number_to_severity(self, number):
         """Convert number to severity category"""
-        mapping = {1: 'CAT_I', 2: 'CAT_II', 3: 'CAT_III'}
-        return mapping.get(number, 'UNKNOWN')
+        return NUMBER_SEVERITIES.get(number, 'UNKNOWN')
 
     def format_compliance_report(self, results, format_type='summary'):
         """
@@ -506,3 +684,68 @@ class FilterModule:
                     merged.append(item)
 
         return merged
+
+    def expand_compliance_results(self, records, rule_set_file):
+        """
+        Expand compact result records to full result dicts for rendering.
+
+        Args:
+            records: Compact results returned by compliance_evaluator
+                (result_format=compact); a list of full results is returned as is
+            rule_set_file: Compiled rule set the records were evaluated with
+
+        Returns:
+            List of result dicts in the execute_check.yml shape
+
+        Raises:
+            ValueError: if the rule set no longer matches the records' fingerprint
+        """
+        if not records:
+            return []
+        if isinstance(records, list):
+            return records
+        try:
+            return load_rule_set(rule_set_file).expand(records)
+        except ValueError as e:
+            raise ValueError(f"{rule_set_file}: {e}; re-run the compliance check to refresh the results")
+
+    def device_results(self, device):
+        """
+        Full results of one device from its all_compliance_results entry.
+
+        Compact records are expanded against the rule set stored with them,
+        so only the device being rendered is ever held expanded; entries
+        from the per-check fallback already hold full results.
+        """
+        device = device or {}
+        if 'records' in device:
+            return self.expand_compliance_results(device['records'], device.get('rule_set'))
+        return device.get('results', [])
+
+    def remediation_plan_commands(self, plan, hostname):
+        """
+        Indented config lines planned for one device.
+
+        Args:
+            plan: Remediation plan written by the remediation_plan module
+            hostname: Device hostname
+
+        Returns:
+            List of config lines in push order (empty if the device has no plan)
+        """
+        device = (plan or {}).get('devices', {}).get(hostname)
+        if not device:
+            return []
+        return self.render_remediation_blocks(plan['blocks'][position] for position in device['blocks'])
+
+    def render_remediation_blocks(self, blocks):
+        """Indented config lines for remediation plan blocks, for display and records"""
+        _add_module_utils_path()
+        from stig_remediation import render_commands
+        return render_commands(blocks or [])
+
+    def remediation_push_blocks(self, blocks):
+        """Plan blocks merged into one ios_config push per run of shared parents"""
+        _add_module_utils_path()
+        from stig_remediation import merge_push_blocks
+        return merge_push_blocks(blocks or [])
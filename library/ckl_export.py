@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Ansible Module: ckl_export
+Write populated STIG Viewer checklists (.ckl) from compliance results.
+
+A template .ckl is split once into literal text and STATUS, FINDING_DETAILS
+and COMMENTS slots. Each device checklist is then streamed straight to disk,
+so no XML tree is built per device. Compact result records are expanded
+inside the module, one device per call. Bulk mode exports saved device JSON
+reports in a process pool.
+
+Usage in playbook:
+  - name: Export device checklist
+    ckl_export:
+      template: /path/to/template.ckl
+      dest: /path/to/switch01.ckl
+      hostname: switch01
+      records: "{{ device_compliance_records }}"
+      rule_set: "{{ device_compliance_rule_set }}"
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.stig_ckl import CKLTemplate
+from ansible.module_utils.stig_evaluator import RuleSetEvaluator
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import json
+import os
+
+DOCUMENTATION = r'''
+---
+module: ckl_export
+short_description: Export compliance results as STIG Viewer checklists
+description:
+    - Fills STATUS, FINDING_DETAILS and COMMENTS of a template .ckl per device
+    - Rules without a result keep the template's STATUS, FINDING_DETAILS and COMMENTS
+    - Streams output without building an XML tree per device
+    - Bulk mode exports many saved device JSON reports in parallel
+version_added: "1.1.0"
+author:
+    - "Cisco STIG Compliance Automation"
+options:
+    template:
+        description:
+            - Template .ckl file (usually the STIG source checklist)
+        type: path
+        required: true
+    dest:
+        description:
+            - Output .ckl file for a single device, or output directory in bulk mode
+        type: path
+        required: true
+    hostname:
+        description:
+            - Device hostname written to the checklist ASSET
+        type: str
+        default: ''
+    host_ip:
+        description:
+            - Device IP address written to the checklist ASSET
+        type: str
+        default: ''
+    results:
+        description:
+            - Full device compliance results (per-check fallback or result_format=full)
+        type: list
+        elements: dict
+        default: []
+    records:
+        description:
+            - Compact device results (device_compliance_records), expanded
+              against I(rule_set) instead of I(results)
+        type: dict
+    rule_set:
+        description:
+            - Compiled rule set the I(records) were evaluated with
+        type: path
+    results_glob:
+        description:
+            - Glob of saved device JSON reports to export in bulk
+            - When set, I(dest) is a directory and one .ckl is written per report
+        type: str
+    workers:
+        description:
+            - Worker processes for bulk export (0 = one per CPU)
+        type: int
+        default: 0
+    comment:
+        description:
+            - Text written to COMMENTS of every evaluated rule
+        type: str
+        default: 'Evaluated by Cisco STIG Compliance Automation'
+'''
+
+EXAMPLES = r'''
+- name: Export device checklist
+  delegate_to: localhost
+  ckl_export:
+    template: "{{ stig_source_file }}"
+    dest: "{{ report_output_dir }}/{{ inventory_hostname }}.ckl"
+    hostname: "{{ inventory_hostname }}"
+    records: "{{ device_compliance_records }}"
+    rule_set: "{{ device_compliance_rule_set }}"
+
+- name: Export all saved device reports from a run
+  ckl_export:
+    template: /path/to/cisco_ios_stig.ckl
+    results_glob: "reports/daily/2024-06-01/*_compliance_*.json"
+    dest: reports/daily/2024-06-01/ckl
+    workers: 8
+'''
+
+RETURN = r'''
+exported:
+    description: Number of checklists written
+    type: int
+    returned: always
+files:
+    description: Written .ckl files with per-file counts
+    type: list
+    returned: always
+    sample:
+        - dest: "/reports/switch01.ckl"
+          hostname: "switch01"
+          evaluated: 28
+          not_reviewed: 122
+'''
+
+# Template shared by bulk worker processes, loaded once per worker
+_worker_template = None
+
+
+def _init_worker(template_path):
+    global _worker_template
+    _worker_template = CKLTemplate(template_path)
+
+
+def _export_report(args):
+    """Export one saved device JSON report (runs in a worker process)"""
+    report_path, dest_dir, comment = args
+
+    with open(report_path, 'r') as f:
+        report = json.load(f)
+
+    device_info = report.get('device_info') or {}
+    hostname = device_info.get('hostname') or os.path.basename(report_path).split('_compliance_')[0]
+    dest = os.path.join(dest_dir, f"{hostname}.ckl")
+
+    counts = _worker_template.write(dest, report.get('results', []), hostname=hostname, comment=comment)
+    counts.update({'dest': dest, 'hostname': hostname})
+    return counts
+
+
+def export_bulk(template_path, report_paths, dest_dir, comment, workers=0):
+    """Export many device JSON reports in a process pool"""
+    os.makedirs(dest_dir, exist_ok=True)
+    jobs = [(path, dest_dir, comment) for path in report_paths]
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        _init_worker(template_path)
+        return [_export_report(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template_path,)) as executor:
+        return list(executor.map(_export_report, jobs, chunksize=16))
+
+
+def main():
+    module_args = dict(
+        template=dict(type='path', required=True),
+        dest=dict(type='path', required=True),
+        hostname=dict(type='str', default=''),
+        host_ip=dict(type='str', default=''),
+        results=dict(type='list', elements='dict', default=[]),
+        records=dict(type='dict'),
+        rule_set=dict(type='path'),
+        results_glob=dict(type='str'),
+        workers=dict(type='int', default=0),
+        comment=dict(type='str', default='Evaluated by Cisco STIG Compliance Automation')
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_together=[('records', 'rule_set')],
+        supports_check_mode=True
+    )
+
+    params = module.params
+    result = dict(changed=False, exported=0, files=[])
+
+    if module.check_mode:
+        module.exit_json(**result)
+
+    try:
+        if params['results_glob']:
+            report_paths = sorted(glob.glob(params['results_glob']))
+            if not report_paths:
+                module.fail_json(msg=f"No device reports found for: {params['results_glob']}")
+
+            files = export_bulk(params['template'], report_paths, params['dest'],
+                                params['comment'], params['workers'])
+        else:
+            dest_dir = os.path.dirname(params['dest'])
+            if dest_dir:
+                os.makedirs(dest_dir, exist_ok=True)
+
+            results = params['results']
+            if params['records'] is not None:
+                results = RuleSetEvaluator.load(params['rule_set']).expand(params['records'])
+
+            template = CKLTemplate(params['template'])
+            counts = template.write(params['dest'], results,
+                                    hostname=params['hostname'], host_ip=params['host_ip'],
+                                    comment=params['comment'])
+            counts.update({'dest': params['dest'], 'hostname': params['hostname']})
+            files = [counts]
+
+        result['files'] = files
+        result['exported'] = len(files)
+        result['changed'] = len(files) > 0
+
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
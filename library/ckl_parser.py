@@ -14,14 +14,20 @@ Usage in playbook:
       src: /path/to/checklist.ckl
       output_format: yaml
     register: stig_rules
+
+  - name: Parse several STIG checklists in parallel
+    ckl_parser:
+      src_glob: /path/to/checklists/*.ckl
+    register: stig_rules
 """
 
 from ansible.module_utils.basic import AnsibleModule
-import xml.etree.ElementTree as ET
+from ansible.module_utils.stig_ckl import CKLParser
 import json
 import yaml
-import re
 import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
 
 DOCUMENTATION = r'''
 ---
@@ -39,8 +45,20 @@ options:
     src:
         description:
             - Path to the .ckl file to parse
+            - Mutually exclusive with I(src_glob)
         type: path
-        required: true
+    src_glob:
+        description:
+            - Directory or glob of .ckl files to parse in bulk
+            - Files are parsed in parallel and merged into one rule set keyed by STIG ID
+            - Mutually exclusive with I(src)
+        type: str
+    workers:
+        description:
+            - Number of worker processes for bulk parsing
+            - 0 uses one worker per CPU
+        type: int
+        default: 0
     output_format:
         description:
             - Output format for parsed rules
@@ -79,6 +97,12 @@ EXAMPLES = r'''
     src: /path/to/checklist.ckl
     extract_fix_commands: true
   register: stig_with_commands
+
+- name: Parse router, switch and NDM STIGs together
+  ckl_parser:
+    src_glob: /path/to/checklists/
+    workers: 4
+  register: multi_stig_data
 '''
 
 RETURN = r'''
@@ -103,6 +127,17 @@ vulns:
           check_content: "Verify AAA is configured..."
           fix_text: "Configure AAA authentication..."
           fix_commands: ["aaa new-model"]
+          benchmarks: ["Cisco IOS XE Router RTR STIG"]
+benchmarks:
+    description: Per-file metadata for bulk parsing
+    type: list
+    returned: when src_glob is used
+    sample:
+        - file: "/path/to/Cisco_IOS_XE_Router_RTR.ckl"
+          title: "Cisco IOS XE Router RTR STIG"
+          version: "2"
+          release: "Release: 3 Benchmark Date: 24 Jul 2024"
+          total_vulns: 120
 summary:
     description: Summary statistics
     type: dict
@@ -115,226 +150,6 @@ summary:
 '''
 
 
-class CKLParser:
-    """Parser for DISA STIG Viewer .ckl files"""
-
-    # Mapping of severity values to categories
-    SEVERITY_MAP = {
-        'high': 'CAT_I',
-        'medium': 'CAT_II',
-        'low': 'CAT_III',
-        'cat_i': 'CAT_I',
-        'cat_ii': 'CAT_II',
-        'cat_iii': 'CAT_III',
-        'i': 'CAT_I',
-        'ii': 'CAT_II',
-        'iii': 'CAT_III',
-        '1': 'CAT_I',
-        '2': 'CAT_II',
-        '3': 'CAT_III'
-    }
-
-    # Common Cisco IOS command patterns for extraction
-    COMMAND_PATTERNS = [
-        r'^\s*(no\s+)?[a-z][\w\-]+(\s+[\w\-./]+)*\s*$',  # Basic commands
-        r'^\s*(interface|line|router|aaa|ip|snmp|logging|ntp|banner|service)\s+.*$',
-        r'^\s*(enable\s+secret|username|crypto|access-list)\s+.*$'
-    ]
-
-    def __init__(self, ckl_path):
-        self.ckl_path = ckl_path
-        self.tree = None
-        self.root = None
-        self.stig_info = {}
-        self.vulns = []
-
-    def parse(self):
-        """Parse the CKL file and extract all vulnerability data"""
-        try:
-            self.tree = ET.parse(self.ckl_path)
-            self.root = self.tree.getroot()
-        except ET.ParseError as e:
-            raise ValueError(f"Failed to parse CKL file: {e}")
-        except FileNotFoundError:
-            raise FileNotFoundError(f"CKL file not found: {self.ckl_path}")
-
-        self._extract_stig_info()
-        self._extract_vulns()
-
-        return {
-            'stig_info': self.stig_info,
-            'vulns': self.vulns,
-            'summary': self._generate_summary()
-        }
-
-    def _extract_stig_info(self):
-        """Extract STIG metadata from the checklist"""
-        # Try to find STIG_INFO element
-        stig_info_elem = self.root.find('.//STIG_INFO')
-
-        if stig_info_elem is not None:
-            for si_data in stig_info_elem.findall('SI_DATA'):
-                sid_name = si_data.find('SID_NAME')
-                sid_data = si_data.find('SID_DATA')
-
-                if sid_name is not None and sid_name.text:
-                    name = sid_name.text.lower().replace(' ', '_')
-                    value = sid_data.text if sid_data is not None else ''
-                    self.stig_info[name] = value
-
-        # Also try alternate locations
-        if not self.stig_info:
-            # Try to extract from iSTIG
-            istig = self.root.find('.//iSTIG')
-            if istig is not None:
-                stig_info = istig.find('STIG_INFO')
-                if stig_info is not None:
-                    for si_data in stig_info.findall('SI_DATA'):
-                        sid_name = si_data.find('SID_NAME')
-                        sid_data = si_data.find('SID_DATA')
-                        if sid_name is not None and sid_name.text:
-                            name = sid_name.text.lower().replace(' ', '_')
-                            value = sid_data.text if sid_data is not None else ''
-                            self.stig_info[name] = value
-
-    def _extract_vulns(self):
-        """Extract all vulnerability entries from the checklist"""
-        # Find all VULN elements
-        for vuln in self.root.findall('.//VULN'):
-            vuln_data = self._parse_vuln(vuln)
-            if vuln_data:
-                self.vulns.append(vuln_data)
-
-    def _parse_vuln(self, vuln_elem):
-        """Parse a single VULN element"""
-        vuln_data = {
-            'vuln_id': '',
-            'rule_id': '',
-            'stig_id': '',
-            'severity': '',
-            'title': '',
-            'description': '',
-            'check_content': '',
-            'fix_text': '',
-            'fix_commands': [],
-            'status': '',
-            'comments': '',
-            'finding_details': ''
-        }
-
-        # Extract STIG_DATA elements
-        for stig_data in vuln_elem.findall('STIG_DATA'):
-            vuln_attribute = stig_data.find('VULN_ATTRIBUTE')
-            attribute_data = stig_data.find('ATTRIBUTE_DATA')
-
-            if vuln_attribute is None or vuln_attribute.text is None:
-                continue
-
-            attr_name = vuln_attribute.text.lower()
-            attr_value = attribute_data.text if attribute_data is not None else ''
-
-            # Map the attribute to our data structure
-            if attr_name == 'vuln_num':
-                vuln_data['vuln_id'] = attr_value
-            elif attr_name == 'rule_id':
-                vuln_data['rule_id'] = attr_value
-            elif attr_name == 'rule_ver' or attr_name == 'stig_id':
-                vuln_data['stig_id'] = attr_value
-            elif attr_name == 'severity':
-                vuln_data['severity'] = self._normalize_severity(attr_value)
-            elif attr_name == 'rule_title':
-                vuln_data['title'] = attr_value
-            elif attr_name == 'vuln_discuss' or attr_name == 'discussion':
-                vuln_data['description'] = attr_value
-            elif attr_name == 'check_content':
-                vuln_data['check_content'] = attr_value
-            elif attr_name == 'fix_text':
-                vuln_data['fix_text'] = attr_value
-
-        # Extract STATUS
-        status_elem = vuln_elem.find('STATUS')
-        if status_elem is not None and status_elem.text:
-            vuln_data['status'] = status_elem.text
-
-        # Extract COMMENTS
-        comments_elem = vuln_elem.find('COMMENTS')
-        if comments_elem is not None and comments_elem.text:
-            vuln_data['comments'] = comments_elem.text
-
-        # Extract FINDING_DETAILS
-        finding_elem = vuln_elem.find('FINDING_DETAILS')
-        if finding_elem is not None and finding_elem.text:
-            vuln_data['finding_details'] = finding_elem.text
-
-        return vuln_data
-
-    def _normalize_severity(self, severity):
-        """Normalize severity value to CAT_I/II/III format"""
-        if not severity:
-            return 'CAT_III'
-
-        severity_lower = severity.lower().strip()
-        return self.SEVERITY_MAP.get(severity_lower, 'CAT_III')
-
-    def extract_fix_commands(self, fix_text):
-        """Extract potential CLI commands from fix text"""
-        if not fix_text:
-            return []
-
-        commands = []
-        lines = fix_text.split('\n')
-
-        for line in lines:
-            line = line.strip()
-
-            # Skip empty lines and common non-command text
-            if not line:
-                continue
-            if line.startswith('#') or line.startswith('!'):
-                continue
-            if any(line.lower().startswith(x) for x in ['note:', 'example:', 'verify', 'check', 'ensure']):
-                continue
-
-            # Check against command patterns
-            for pattern in self.COMMAND_PATTERNS:
-                if re.match(pattern, line, re.IGNORECASE):
-                    # Clean up the command
-                    cmd = line.strip()
-                    if cmd and len(cmd) > 3:
-                        commands.append(cmd)
-                    break
-
-        return list(dict.fromkeys(commands))  # Remove duplicates while preserving order
-
-    def _generate_summary(self):
-        """Generate summary statistics"""
-        summary = {
-            'total_vulns': len(self.vulns),
-            'cat_i_count': 0,
-            'cat_ii_count': 0,
-            'cat_iii_count': 0,
-            'by_status': {},
-            'stig_title': self.stig_info.get('title', 'Unknown'),
-            'stig_version': self.stig_info.get('version', 'Unknown'),
-            'stig_release': self.stig_info.get('releaseinfo', 'Unknown')
-        }
-
-        for vuln in self.vulns:
-            severity = vuln.get('severity', '')
-            status = vuln.get('status', 'Not_Reviewed')
-
-            if severity == 'CAT_I':
-                summary['cat_i_count'] += 1
-            elif severity == 'CAT_II':
-                summary['cat_ii_count'] += 1
-            elif severity == 'CAT_III':
-                summary['cat_iii_count'] += 1
-
-            summary['by_status'][status] = summary['by_status'].get(status, 0) + 1
-
-        return summary
-
-
 def parse_text_config_rules(file_path):
     """
     Parse a text/YAML file containing configuration rules.
@@ -410,9 +225,122 @@ def parse_text_config_rules(file_path):
     return rules
 
 
+def find_ckl_files(src_glob):
+    """Resolve a directory or glob pattern to a sorted list of .ckl files"""
+    if os.path.isdir(src_glob):
+        src_glob = os.path.join(src_glob, '*.ckl')
+    return sorted(p for p in glob.glob(src_glob) if p.lower().endswith('.ckl'))
+
+
+def parse_ckl_file(path, extract_commands=True):
+    """
+    Parse a single CKL file. Top-level so it can run in a worker process.
+
+    Returns:
+        Parsed data dict from CKLParser.parse() plus the source 'file'
+    """
+    parser = CKLParser(path)
+    parsed_data = parser.parse()
+
+    if extract_commands:
+        for vuln in parsed_data['vulns']:
+            vuln['fix_commands'] = parser.extract_fix_commands(vuln.get('fix_text', ''))
+
+    parsed_data['file'] = path
+    return parsed_data
+
+
+def merge_parsed_checklists(parsed_list):
+    """
+    Merge several parsed checklists into one rule set keyed by STIG ID.
+
+    When the same STIG ID appears in more than one benchmark, the first
+    occurrence is kept (with the highest severity seen) and every benchmark
+    it came from is recorded in its 'benchmarks' list.
+
+    Returns:
+        Dict with 'stig_info', 'vulns', 'benchmarks' and 'summary'
+    """
+    severity_rank = {'CAT_I': 1, 'CAT_II': 2, 'CAT_III': 3}
+    merged = {}
+    benchmarks = []
+
+    for parsed in parsed_list:
+        stig_info = parsed['stig_info']
+        title = stig_info.get('title') or os.path.basename(parsed['file'])
+        benchmarks.append({
+            'file': parsed['file'],
+            'title': title,
+            'version': stig_info.get('version', 'Unknown'),
+            'release': stig_info.get('releaseinfo', 'Unknown'),
+            'total_vulns': len(parsed['vulns'])
+        })
+
+        for vuln in parsed['vulns']:
+            key = vuln.get('stig_id') or vuln.get('vuln_id')
+            if not key:
+                continue
+
+            existing = merged.get(key)
+            if existing is None:
+                vuln['benchmarks'] = [title]
+                merged[key] = vuln
+                continue
+
+            if title not in existing['benchmarks']:
+                existing['benchmarks'].append(title)
+            if severity_rank.get(vuln.get('severity'), 99) < severity_rank.get(existing.get('severity'), 99):
+                existing['severity'] = vuln['severity']
+
+    vulns = list(merged.values())
+    stig_info = {
+        'title': ' + '.join(b['title'] for b in benchmarks) if benchmarks else 'Unknown',
+        'version': ', '.join(b['version'] for b in benchmarks) if benchmarks else 'Unknown',
+        'releaseinfo': ', '.join(b['release'] for b in benchmarks) if benchmarks else 'Unknown'
+    }
+
+    summary = CKLParser.summarize(vulns, stig_info)
+    summary['benchmark_count'] = len(benchmarks)
+    summary['source_vulns'] = sum(b['total_vulns'] for b in benchmarks)
+    summary['duplicates_merged'] = summary['source_vulns'] - len(vulns)
+
+    return {
+        'stig_info': stig_info,
+        'vulns': vulns,
+        'benchmarks': benchmarks,
+        'summary': summary
+    }
+
+
+def parse_ckl_bulk(paths, extract_commands=True, workers=0):
+    """
+    Parse several CKL files in a process pool and merge the results.
+
+    Args:
+        paths: List of .ckl file paths
+        extract_commands: Extract CLI commands from fix text
+        workers: Worker process count (0 = one per CPU)
+
+    Returns:
+        Merged data dict from merge_parsed_checklists()
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(paths))
+
+    if workers <= 1:
+        parsed_list = [parse_ckl_file(p, extract_commands) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed_list = list(executor.map(parse_ckl_file, paths, [extract_commands] * len(paths)))
+
+    return merge_parsed_checklists(parsed_list)
+
+
 def main():
     module_args = dict(
-        src=dict(type='path', required=True),
+        src=dict(type='path'),
+        src_glob=dict(type='str'),
+        workers=dict(type='int', default=0),
         output_format=dict(type='str', choices=['dict', 'yaml', 'json'], default='dict'),
         severity_filter=dict(type='list', elements='str', default=[]),
         extract_fix_commands=dict(type='bool', default=True)
@@ -420,10 +348,13 @@ def main():
 
     module = AnsibleModule(
         argument_spec=module_args,
+        required_one_of=[('src', 'src_glob')],
+        mutually_exclusive=[('src', 'src_glob')],
         supports_check_mode=True
     )
 
     src = module.params['src']
+    src_glob = module.params['src_glob']
     output_format = module.params['output_format']
     severity_filter = module.params['severity_filter']
     extract_commands = module.params['extract_fix_commands']
@@ -438,7 +369,25 @@ def main():
 
     try:
         # Determine file type and parse accordingly
-        if src.lower().endswith('.ckl'):
+        if src_glob:
+            paths = find_ckl_files(src_glob)
+            if not paths:
+                module.fail_json(msg=f"No .ckl files found for: {src_glob}")
+
+            parsed_data = parse_ckl_bulk(paths, extract_commands, module.params['workers'])
+
+            result['stig_info'] = parsed_data['stig_info']
+            result['vulns'] = parsed_data['vulns']
+            result['summary'] = parsed_data['summary']
+            result['benchmarks'] = parsed_data['benchmarks']
+
+            # Apply severity filter
+            if severity_filter:
+                normalized_filter = [CKLParser.SEVERITY_MAP.get(s.lower(), s.upper()) for s in severity_filter]
+                result['vulns'] = [v for v in result['vulns'] if v.get('severity') in normalized_filter]
+                result['summary']['filtered_count'] = len(result['vulns'])
+
+        elif src.lower().endswith('.ckl'):
             parser = CKLParser(src)
             parsed_data = parser.parse()
 
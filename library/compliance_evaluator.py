@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Ansible Module: compliance_evaluator
+Compile compliance checks into a rule set and evaluate devices against it.
+
+The compile step runs once per play and writes the rule set to disk. The
+evaluate step loads it and returns every check result for a device in a
+single call, replacing the per-check Jinja logic in execute_check.yml.
+
+Usage in playbook:
+  - name: Compile compliance checks
+    compliance_evaluator:
+      action: compile
+      checks: "{{ compliance_checks }}"
+      dest: /tmp/rule_set.json
+    register: compiled_rule_set
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.stig_evaluator import (
+    MappedConfig, RuleSetEvaluator, latest_running_config, load_rule_set, merge_results
+)
+import json
+import os
+
+DOCUMENTATION = r'''
+---
+module: compliance_evaluator
+short_description: Compile and evaluate STIG compliance rule sets
+description:
+    - Compiles the compliance_checks list into a serialized rule set
+    - Evaluates a device's configuration against a compiled rule set
+    - Groups rules by source command so each output is processed once
+    - Derives running-config include/section outputs offline
+    - Re-evaluates saved backup configs for a subset of rules and merges the
+      updated rules into stored results
+    - Writes the consolidated results file, expanding compact records one
+      device at a time
+version_added: "1.1.0"
+author:
+    - "Cisco STIG Compliance Automation"
+options:
+    action:
+        description:
+            - C(compile) writes a rule set, C(evaluate) checks a device,
+              C(reevaluate) checks the latest saved config of every device in I(backup_dir),
+              C(load) reads an already compiled rule set and returns what C(compile) returns,
+              C(export) writes I(devices) to the consolidated results file I(dest)
+        type: str
+        choices: ['compile', 'evaluate', 'reevaluate', 'load', 'export']
+        default: 'evaluate'
+    checks:
+        description:
+            - Compliance checks to compile (action=compile)
+        type: list
+        elements: dict
+        default: []
+    categories:
+        description:
+            - Ordered list of enabled check categories
+            - If not specified, all checks are compiled
+        type: list
+        elements: str
+    dest:
+        description:
+            - Where to write the compiled rule set (action=compile) or the
+              consolidated results (action=export)
+        type: path
+    rule_set:
+        description:
+            - Path to a compiled rule set (action=evaluate, action=reevaluate, action=load)
+        type: path
+    stig_ids:
+        description:
+            - Restrict evaluation to these STIG IDs
+            - If not specified, all rules in the rule set are evaluated
+        type: list
+        elements: str
+    backup_dir:
+        description:
+            - Backup store with one sub-directory per device (action=reevaluate)
+        type: path
+    running_config:
+        description:
+            - Device running configuration
+        type: str
+        default: ''
+    outputs:
+        description:
+            - Dict of show command to output for commands run on the device
+        type: dict
+        default: {}
+    command_results:
+        description:
+            - Registered results of an ios_command loop over the rule set commands
+        type: list
+        elements: dict
+        default: []
+    merge_into:
+        description:
+            - Stored results file (consolidated JSON report shape) to update in
+              place with the re-evaluated rules (action=reevaluate)
+            - Per-device summaries and overall statistics are recalculated
+        type: path
+    removed_stig_ids:
+        description:
+            - STIG IDs dropped by a new release; removed from I(merge_into)
+        type: list
+        elements: str
+        default: []
+    release_info:
+        description:
+            - Release details recorded with the merge in I(merge_into) under C(release_updates)
+        type: dict
+    devices:
+        description:
+            - Hostname to device data map (all_compliance_results) to export;
+              compact records are expanded against the rule set stored with them
+        type: dict
+        default: {}
+    report_info:
+        description:
+            - Report metadata written with the exported results (action=export)
+        type: dict
+        default: {}
+    result_format:
+        description:
+            - C(full) returns one result dict per check in I(results)
+            - C(compact) returns I(records) holding only per-device facts
+              (status, details code, output reference); expand them with the
+              expand_compliance_results filter when rendering
+        type: str
+        choices: ['full', 'compact']
+        default: 'full'
+'''
+
+EXAMPLES = r'''
+- name: Compile compliance checks
+  compliance_evaluator:
+    action: compile
+    checks: "{{ compliance_checks }}"
+    categories: "{{ stig_check_categories | dict2items | selectattr('value') | map(attribute='key') | list }}"
+    dest: "{{ compiled_rule_set_file }}"
+  register: compiled_rule_set
+
+- name: Use the rule set compiled by an earlier run
+  compliance_evaluator:
+    action: load
+    rule_set: "{{ compiled_rule_set_file }}"
+  register: compiled_rule_set
+
+- name: Evaluate device
+  compliance_evaluator:
+    action: evaluate
+    rule_set: "{{ compiled_rule_set_file }}"
+    running_config: "{{ running_config }}"
+    command_results: "{{ check_command_outputs.results }}"
+  register: evaluation
+
+- name: Evaluate device keeping compact result records
+  compliance_evaluator:
+    action: evaluate
+    rule_set: "{{ compiled_rule_set_file }}"
+    running_config: "{{ running_config }}"
+    result_format: compact
+  register: evaluation
+
+- name: Write consolidated results
+  compliance_evaluator:
+    action: export
+    devices: "{{ all_compliance_results }}"
+    report_info:
+      generated: "{{ ansible_date_time.iso8601 }}"
+      report_type: consolidated_compliance
+    dest: "{{ consolidated_report_file }}.json"
+
+- name: Re-evaluate changed rules against saved configs
+  compliance_evaluator:
+    action: reevaluate
+    rule_set: "{{ compiled_rule_set_file }}"
+    stig_ids: "{{ stig_release_changes.affected_stig_ids }}"
+    backup_dir: "{{ backup_dir }}"
+  register: release_reevaluation
+'''
+
+RETURN = r'''
+commands:
+    description: Unique show commands used by the rule set
+    type: list
+    returned: action=compile or action=load
+device_commands:
+    description: Commands that must be run on the device (cannot be derived from running-config)
+    type: list
+    returned: action=compile or action=load
+total_checks:
+    description: Number of compiled checks
+    type: int
+    returned: action is not export
+results:
+    description: Check results in the same shape as execute_check.yml
+    type: list
+    returned: action=evaluate and result_format=full
+records:
+    description: Compact results (fingerprint, per-check records, shared outputs)
+    type: dict
+    returned: action=evaluate and result_format=compact
+summary:
+    description: Compliance counts for the device
+    type: dict
+    returned: action=evaluate
+device_results:
+    description: Per-device results and summary keyed by hostname
+    type: dict
+    returned: action=reevaluate
+device_only_rules:
+    description: STIG IDs skipped offline because they need a device command
+    type: list
+    returned: action=reevaluate
+merged_devices:
+    description: Devices in I(merge_into) whose stored results were updated
+    type: list
+    returned: action=reevaluate and merge_into is set
+overall_stats:
+    description: Overall statistics written with the exported results
+    type: dict
+    returned: action=export
+'''
+
+
+def collect_outputs(command_results):
+    """Split registered ios_command loop results into outputs and errors"""
+    outputs = {}
+    errors = {}
+    for item in command_results:
+        command = item.get('item')
+        if not command:
+            continue
+        stdout = item.get('stdout')
+        if item.get('failed') or not stdout:
+            errors[command] = item.get('msg', 'Unknown error')
+        else:
+            outputs[command] = stdout[0]
+    return outputs, errors
+
+
+def reevaluate_backups(evaluator, backup_dir):
+    """
+    Evaluate the latest saved running config of every device.
+
+    Returns:
+        Dict of hostname -> {'config_file', 'results', 'summary'}
+    """
+    device_results = {}
+    for hostname in sorted(os.listdir(backup_dir)):
+        device_dir = os.path.join(backup_dir, hostname)
+        if not os.path.isdir(device_dir):
+            continue
+
+        config_file = latest_running_config(device_dir)
+        if config_file is None:
+            continue
+
+        with MappedConfig(config_file) as running_config:
+            results = evaluator.evaluate(running_config)
+        device_results[hostname] = {
+            'config_file': config_file,
+            'results': results,
+            'summary': evaluator.summarize(results)
+        }
+    return device_results
+
+
+def overall_stats(devices):
+    """Overall statistics in the consolidated report shape"""
+    summaries = [device.get('summary', {}) for device in devices.values()]
+    total_checks = sum(int(s.get('total_checks', 0)) for s in summaries)
+    total_compliant = sum(int(s.get('compliant', 0)) for s in summaries)
+    return {
+        'total_devices': len(summaries),
+        'total_checks': total_checks,
+        'total_compliant': total_compliant,
+        'total_non_compliant': sum(int(s.get('non_compliant', 0)) for s in summaries),
+        'total_errors': sum(int(s.get('errors', 0)) for s in summaries),
+        'devices_100_compliant': sum(1 for s in summaries if float(s.get('compliance_percentage', 0)) == 100),
+        'overall_percentage': round(total_compliant / total_checks * 100, 2) if total_checks else 0
+    }
+
+
+def expand_device(device):
+    """Device data with compact records replaced by full results"""
+    if 'records' not in device:
+        return device
+    expanded = {key: value for key, value in device.items() if key not in ('records', 'rule_set')}
+    try:
+        expanded['results'] = load_rule_set(device['rule_set']).expand(device['records'])
+    except ValueError as e:
+        raise ValueError(f"{device['rule_set']}: {e}")
+    return expanded
+
+
+def indented_json(value, indent):
+    """Pretty JSON of a value nested ``indent`` spaces deep"""
+    return json.dumps(value, indent=4, sort_keys=True).replace('\n', '\n' + ' ' * indent)
+
+
+def export_results(path, devices, report_info, stats):
+    """
+    Write the consolidated results file (report_info, overall_stats and
+    devices with full results).
+
+    The output matches to_nice_json of the whole structure, but devices are
+    expanded and written one at a time, so the fleet is never held expanded.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write('{\n    "devices": {')
+        for index, hostname in enumerate(sorted(devices)):
+            f.write(',' if index else '')
+            f.write(f'\n        {json.dumps(hostname)}: {indented_json(expand_device(devices[hostname]), 8)}')
+        f.write('\n    },' if devices else '},')
+        f.write(f'\n    "overall_stats": {indented_json(stats, 4)},')
+        f.write(f'\n    "report_info": {indented_json(report_info, 4)}\n}}')
+    os.replace(tmp_path, path)
+
+
+def merge_into_stored(path, device_results, removed_stig_ids, release_info=None):
+    """
+    Merge re-evaluated rules into a stored results file so reports read the
+    new release's results without a full rescan.
+
+    Returns:
+        Hostnames whose stored results were updated
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    merged = []
+    for hostname, device in data.get('devices', {}).items():
+        # Compact records cannot be merged rule by rule
+        if 'results' not in device:
+            continue
+        updated = device_results.get(hostname, {}).get('results', [])
+        if not updated and not removed_stig_ids:
+            continue
+        device['results'] = merge_results(device['results'], updated, removed_stig_ids)
+        device['summary'] = dict(device.get('summary', {}), **RuleSetEvaluator.summarize(device['results']))
+        merged.append(hostname)
+
+    if 'overall_stats' in data:
+        data['overall_stats'] = overall_stats(data['devices'])
+    if release_info:
+        data.setdefault('release_updates', []).append(dict(release_info, devices=merged))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+    return merged
+
+
+def main():
+    module_args = dict(
+        action=dict(type='str', choices=['compile', 'evaluate', 'reevaluate', 'load', 'export'], default='evaluate'),
+        checks=dict(type='list', elements='dict', default=[]),
+        categories=dict(type='list', elements='str'),
+        dest=dict(type='path'),
+        rule_set=dict(type='path'),
+        stig_ids=dict(type='list', elements='str'),
+        backup_dir=dict(type='path'),
+        running_config=dict(type='str', default=''),
+        outputs=dict(type='dict', default={}),
+        command_results=dict(type='list', elements='dict', default=[]),
+        merge_into=dict(type='path'),
+        removed_stig_ids=dict(type='list', elements='str', default=[]),
+        release_info=dict(type='dict'),
+        devices=dict(type='dict', default={}),
+        report_info=dict(type='dict', default={}),
+        result_format=dict(type='str', choices=['full', 'compact'], default='full')
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_if=[
+            ('action', 'compile', ['dest']),
+            ('action', 'evaluate', ['rule_set']),
+            ('action', 'reevaluate', ['rule_set', 'backup_dir']),
+            ('action', 'load', ['rule_set']),
+            ('action', 'export', ['dest'])
+        ],
+        supports_check_mode=True
+    )
+
+    params = module.params
+    result = dict(changed=False)
+
+    try:
+        if params['action'] == 'compile':
+            evaluator = RuleSetEvaluator(params['checks'], params['categories'])
+
+            if not module.check_mode:
+                dest_dir = os.path.dirname(params['dest'])
+                if dest_dir:
+                    os.makedirs(dest_dir, exist_ok=True)
+                evaluator.save(params['dest'])
+                result['changed'] = True
+
+            result['commands'] = evaluator.commands
+            result['device_commands'] = evaluator.device_commands()
+            result['total_checks'] = len(evaluator)
+
+        elif params['action'] == 'load':
+            evaluator = RuleSetEvaluator.load(params['rule_set'])
+            result['commands'] = evaluator.commands
+            result['device_commands'] = evaluator.device_commands()
+            result['total_checks'] = len(evaluator)
+
+        elif params['action'] == 'export':
+            result['overall_stats'] = overall_stats(params['devices'])
+            if not module.check_mode:
+                dest_dir = os.path.dirname(params['dest'])
+                if dest_dir:
+                    os.makedirs(dest_dir, exist_ok=True)
+                export_results(params['dest'], params['devices'], params['report_info'], result['overall_stats'])
+                result['changed'] = True
+
+        elif params['action'] == 'reevaluate':
+            evaluator = RuleSetEvaluator.load(params['rule_set'])
+            if params['stig_ids'] is not None:
+                evaluator = evaluator.subset(params['stig_ids'])
+
+            evaluator, device_only = evaluator.offline_subset()
+
+            result['device_results'] = reevaluate_backups(evaluator, params['backup_dir'])
+            result['device_only_rules'] = device_only
+            result['total_checks'] = len(evaluator)
+
+            if params['merge_into'] and not module.check_mode:
+                result['merged_devices'] = merge_into_stored(
+                    params['merge_into'], result['device_results'],
+                    params['removed_stig_ids'], params['release_info']
+                )
+                result['changed'] = bool(result['merged_devices'])
+
+        else:
+            evaluator = RuleSetEvaluator.load(params['rule_set'])
+            if params['stig_ids'] is not None:
+                evaluator = evaluator.subset(params['stig_ids'])
+
+            outputs, errors = collect_outputs(params['command_results'])
+            outputs.update(params['outputs'])
+
+            compact = evaluator.evaluate_compact(params['running_config'], outputs, errors)
+            if params['result_format'] == 'compact':
+                result['records'] = compact.to_dict()
+            else:
+                result['results'] = evaluator.expand(compact)
+            result['summary'] = compact.summarize()
+            result['total_checks'] = len(evaluator)
+
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Ansible Module: remediation_plan
+Compute per-device remediation plans offline.
+
+Collects the failing rules of every device from saved results (or by
+evaluating the latest saved configs), merges their fix commands into one
+dependency-ordered, de-duplicated change set per device, leaves out lines
+already present in the saved config, and writes a compact fleet plan file
+that can be reviewed and later pushed by the remediation role without
+re-evaluating anything.
+
+Usage in playbook:
+  - name: Build remediation plan
+    remediation_plan:
+      rule_set: /path/to/compiled_rule_set.json
+      backup_dir: /path/to/backups
+      dest: /path/to/remediation_plan.json
+    register: remediation_plan
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.stig_evaluator import (
+    MappedConfig, RuleSetEvaluator, CompactResults, STATUS_COMPLIANT, STATUS_NAMES, iter_lines, latest_running_config
+)
+from ansible.module_utils.stig_remediation import RemediationPlan
+from datetime import datetime, timezone
+import json
+import os
+
+DOCUMENTATION = r'''
+---
+module: remediation_plan
+short_description: Compute dependency-ordered remediation plans offline
+description:
+    - Builds one remediation change set per device from saved configs and results
+    - Parses fix commands by config hierarchy so sub-commands of the same parent are grouped
+    - Collapses duplicate lines across rules and skips lines already in the saved config
+    - Orders commands by dependency (e.g. aaa new-model before other aaa commands)
+    - Writes a compact plan file (shared block table, block indexes per device)
+    - Rules whose check errored are planned like failures and listed as unverified per device
+version_added: "1.1.0"
+author:
+    - "Cisco STIG Compliance Automation"
+options:
+    rule_set:
+        description:
+            - Compiled rule set; required unless every device in I(results_file) has full results
+            - Without I(results_file), devices are evaluated offline against it
+        type: path
+    backup_dir:
+        description:
+            - Backup store with one sub-directory per device
+            - The latest saved running config of each device is evaluated (without I(results_file))
+              and used to skip lines that are already configured
+        type: path
+    results_file:
+        description:
+            - Saved results to plan from instead of evaluating, such as a consolidated JSON report
+            - Devices may hold full C(results) or compact C(records)
+        type: path
+    hosts:
+        description:
+            - Restrict the plan to these devices
+        type: list
+        elements: str
+    severities:
+        description:
+            - Only plan fixes for rules of these severities
+        type: list
+        elements: str
+        default: ['CAT_I', 'CAT_II', 'CAT_III']
+    dest:
+        description:
+            - Where to write the plan file
+        type: path
+'''
+
+EXAMPLES = r'''
+- name: Plan remediation from saved configs
+  delegate_to: localhost
+  run_once: true
+  remediation_plan:
+    rule_set: "{{ compiled_rule_set_file }}"
+    backup_dir: "{{ backup_dir }}"
+    dest: "{{ remediation_plan_dir }}/remediation_plan_{{ report_timestamp }}.json"
+  register: remediation_plan
+
+- name: Plan CAT I fixes from the latest consolidated report
+  remediation_plan:
+    results_file: reports/daily/2024-06-01/consolidated_compliance_20240601T060000.json
+    rule_set: "{{ compiled_rule_set_file }}"
+    backup_dir: "{{ backup_dir }}"
+    severities: ['CAT_I']
+    dest: /tmp/cat_i_plan.json
+  register: remediation_plan
+'''
+
+RETURN = r'''
+summary:
+    description: Device, block and command counts, duplicates collapsed and lines already present
+    type: dict
+    returned: always
+    sample:
+        devices: 500
+        devices_with_changes: 412
+        unique_blocks: 37
+        commands: 6180
+        duplicates_collapsed: 824
+        already_present: 1240
+        unverified: 3
+        rules_without_fix_commands: []
+devices:
+    description: Per-device rule count, block count and command count
+    type: dict
+    returned: always
+device_only_rules:
+    description: STIG IDs not planned offline because they need a device command
+    type: list
+    returned: when devices are evaluated from I(backup_dir)
+'''
+
+
+def failing_rules(evaluator, compact):
+    """
+    (stig_id, severity, fix_commands, status) of the rules in CompactResults
+    that are not compliant. Checks that errored are included, as the
+    remediation role remediates every non-compliant result.
+    """
+    if compact.fingerprint != evaluator.fingerprint:
+        raise ValueError('Compact results were produced by a different rule set')
+    return [
+        (rule.stig_id, rule.check.get('severity', ''), rule.check.get('fix_commands') or [], STATUS_NAMES[record.status])
+        for rule, record in zip(evaluator.rules, compact.records)
+        if record.status != STATUS_COMPLIANT
+    ]
+
+
+def failing_results(results):
+    """(stig_id, severity, fix_commands, status) of the non-compliant results of one device"""
+    return [
+        (result['stig_id'], result.get('severity', ''), result.get('fix_commands') or [], result.get('status', ''))
+        for result in results
+        if not result.get('compliant')
+    ]
+
+
+def plan_device(plan, hostname, findings, severities, config_lines=None, config_file=None):
+    """Add one device's findings of the wanted severities to the plan"""
+    findings = [finding for finding in findings if finding[1] in severities]
+    plan.add_device(
+        hostname,
+        [finding[:3] for finding in findings],
+        config_lines,
+        config_file,
+        unverified={finding[0] for finding in findings if finding[3] == 'Error'}
+    )
+
+
+def load_saved_findings(path, evaluator):
+    """Failing rules per device from a saved results file"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    findings = {}
+    for hostname, device in data.get('devices', data).items():
+        if 'records' in device:
+            if evaluator is None:
+                raise ValueError(f"Results for {hostname} are compact records; rule_set is required")
+            findings[hostname] = failing_rules(evaluator, CompactResults.from_dict(device['records']))
+        else:
+            findings[hostname] = failing_results(device.get('results') or [])
+    return findings
+
+
+def backup_hosts(backup_dir):
+    """Device directories in a backup store"""
+    return sorted(
+        name for name in os.listdir(backup_dir)
+        if os.path.isdir(os.path.join(backup_dir, name))
+    )
+
+
+def main():
+    module_args = dict(
+        rule_set=dict(type='path'),
+        backup_dir=dict(type='path'),
+        results_file=dict(type='path'),
+        hosts=dict(type='list', elements='str'),
+        severities=dict(type='list', elements='str', default=['CAT_I', 'CAT_II', 'CAT_III']),
+        dest=dict(type='path')
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_one_of=[('backup_dir', 'results_file')],
+        supports_check_mode=True
+    )
+
+    params = module.params
+    result = dict(changed=False)
+
+    try:
+        evaluator = RuleSetEvaluator.load(params['rule_set']) if params['rule_set'] else None
+        fingerprint = evaluator.fingerprint if evaluator is not None else None
+
+        saved = None
+        if params['results_file']:
+            saved = load_saved_findings(params['results_file'], evaluator)
+            hostnames = sorted(saved)
+        elif evaluator is None:
+            raise ValueError('rule_set is required to evaluate saved configs')
+        else:
+            evaluator, device_only = evaluator.offline_subset()
+            result['device_only_rules'] = device_only
+            hostnames = backup_hosts(params['backup_dir'])
+
+        plan = RemediationPlan(
+            rule_set=fingerprint,
+            generated=datetime.now(timezone.utc).isoformat()
+        )
+
+        wanted = set(params['hosts']) if params['hosts'] is not None else None
+        severities = set(params['severities'])
+        for hostname in hostnames:
+            if wanted is not None and hostname not in wanted:
+                continue
+
+            config_file = None
+            device_dir = os.path.join(params['backup_dir'], hostname) if params['backup_dir'] else None
+            if device_dir and os.path.isdir(device_dir):
+                config_file = latest_running_config(device_dir)
+
+            if config_file is None:
+                if saved is not None:
+                    plan_device(plan, hostname, saved[hostname], severities)
+                continue
+
+            # One mapping serves both the offline evaluation and the
+            # already-configured check
+            with MappedConfig(config_file) as running_config:
+                if saved is not None:
+                    findings = saved[hostname]
+                else:
+                    findings = failing_rules(evaluator, evaluator.evaluate_compact(running_config))
+                plan_device(plan, hostname, findings, severities, iter_lines(running_config), config_file)
+
+        if params['dest'] and not module.check_mode:
+            dest_dir = os.path.dirname(params['dest'])
+            if dest_dir:
+                os.makedirs(dest_dir, exist_ok=True)
+            plan.save(params['dest'])
+            result['changed'] = True
+
+        result['summary'] = plan.summary()
+        result['devices'] = {
+            hostname: {
+                'rules': len(device['stig_ids']),
+                'blocks': len(device['blocks']),
+                'commands': device['commands']
+            }
+            for hostname, device in plan.devices.items()
+        }
+
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Ansible Module: report_manifest
+Maintain the append-only run manifest behind the report index.
+
+Every run appends one JSON line to reports/manifest.jsonl holding its run
+id, schedule, device scores, overall score and artifact paths. A small
+latest.json next to it keeps the newest run per schedule and the run count,
+so the report index and the latest/ copies are rendered without listing
+report directories. Recent runs are read from the end of the manifest, so
+the cost does not grow with the length of the history.
+
+Usage in playbook:
+  - name: Record run in report manifest
+    report_manifest:
+      report_dir: /path/to/reports
+      run_id: daily-20240601T060000
+      schedule: daily
+      score: 94.5
+      artifacts:
+        consolidated_html: /path/to/reports/daily/2024-06-01/consolidated_compliance_20240601T060000.html
+    register: report_manifest
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+import json
+import os
+
+DOCUMENTATION = r'''
+---
+module: report_manifest
+short_description: Maintain the append-only report run manifest
+description:
+    - Appends one line per run to a JSON lines manifest
+    - Keeps the newest run per schedule in a small latest.json
+    - Returns recent runs by reading the manifest from the end
+    - Drops returned artifacts whose files were removed by report retention
+version_added: "1.1.0"
+author:
+    - "Cisco STIG Compliance Automation"
+options:
+    action:
+        description:
+            - C(append) records a run, C(read) only returns latest and recent runs
+        type: str
+        choices: ['append', 'read']
+        default: 'append'
+    report_dir:
+        description:
+            - Root of the reports tree; artifact paths are stored relative to it
+        type: path
+        required: true
+    manifest:
+        description:
+            - Manifest file, defaults to I(report_dir)/manifest.jsonl
+        type: path
+    run_id:
+        description:
+            - Unique run identifier (action=append)
+        type: str
+    schedule:
+        description:
+            - Schedule type of the run (daily, weekly, monthly, manual)
+        type: str
+        default: 'manual'
+    timestamp:
+        description:
+            - Run timestamp (ISO 8601)
+        type: str
+        default: ''
+    score:
+        description:
+            - Overall compliance percentage of the run
+        type: float
+        default: 0
+    devices:
+        description:
+            - Device compliance summaries (hostname, compliance_percentage)
+        type: list
+        elements: dict
+        default: []
+    artifacts:
+        description:
+            - Dict of artifact name to path; paths that do not exist are dropped
+        type: dict
+        default: {}
+    device_report_prefix:
+        description:
+            - Per-device report path with C({hostname}) in place of the device name
+        type: str
+        default: ''
+    device_report_formats:
+        description:
+            - File extensions written for every device report
+        type: list
+        elements: str
+        default: []
+    recent:
+        description:
+            - Number of recent runs to return
+        type: int
+        default: 50
+'''
+
+EXAMPLES = r'''
+- name: Record run in report manifest
+  report_manifest:
+    report_dir: "{{ report_dir }}"
+    run_id: "{{ report_schedule_type }}-{{ report_timestamp }}"
+    schedule: "{{ report_schedule_type }}"
+    timestamp: "{{ ansible_date_time.iso8601 }}"
+    score: "{{ overall_stats.overall_percentage }}"
+    devices: "{{ ansible_play_hosts | map('extract', hostvars, 'device_compliance_summary') | select('defined') | list }}"
+    artifacts:
+      consolidated_html: "{{ consolidated_report_file }}.html"
+  register: report_manifest
+
+- name: Read recent runs for the index
+  report_manifest:
+    action: read
+    report_dir: "{{ report_dir }}"
+    recent: 100
+  register: report_manifest
+'''
+
+RETURN = r'''
+entry:
+    description: Manifest entry written for this run
+    type: dict
+    returned: action=append
+latest:
+    description: Newest run per schedule, plus C(all) for the newest run overall
+    type: dict
+    returned: always
+recent_runs:
+    description:
+        - Most recent runs, newest first, without per-device scores
+        - Artifacts whose files no longer exist are left out and their names
+          listed in C(expired_artifacts)
+    type: list
+    returned: always
+total_runs:
+    description: Number of runs recorded in the manifest
+    type: int
+    returned: always
+'''
+
+TAIL_BLOCK_SIZE = 65536
+
+
+def read_tail(path, count):
+    """
+    Read the last ``count`` JSON lines of a file by seeking from the end.
+
+    Returns:
+        List of decoded entries, newest first
+    """
+    if count <= 0 or not os.path.exists(path):
+        return []
+
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        buffer = b''
+        while position > 0 and buffer.count(b'\n') <= count:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+
+    lines = buffer.splitlines()
+    if position > 0:
+        # First line was cut by the block boundary
+        lines = lines[1:]
+
+    entries = []
+    for line in reversed(lines):
+        if len(entries) == count:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            # Torn write from an interrupted run
+            continue
+    return entries
+
+
+def relative_path(path, report_dir):
+    """Artifact path relative to the reports tree"""
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(report_dir))
+
+
+def build_entry(params):
+    """Manifest line for one run"""
+    report_dir = params['report_dir']
+
+    artifacts = {
+        name: relative_path(path, report_dir)
+        for name, path in sorted(params['artifacts'].items())
+        if path and os.path.exists(path)
+    }
+
+    devices = {}
+    for summary in params['devices']:
+        hostname = summary.get('hostname')
+        if hostname:
+            devices[hostname] = summary.get('compliance_percentage', 0)
+
+    entry = {
+        'run_id': params['run_id'],
+        'schedule': params['schedule'],
+        'timestamp': params['timestamp'],
+        'score': params['score'],
+        'device_count': len(devices),
+        'artifacts': artifacts,
+        'devices': devices
+    }
+    if params['device_report_prefix']:
+        entry['device_reports'] = {
+            'prefix': relative_path(params['device_report_prefix'], report_dir),
+            'formats': params['device_report_formats']
+        }
+    return entry
+
+
+def run_summary(entry):
+    """Entry without per-device scores, as used by the index"""
+    return {key: value for key, value in entry.items() if key != 'devices'}
+
+
+def existing_artifacts(summary, report_dir):
+    """
+    Run summary with artifacts whose files are gone left out.
+
+    Retention deletes expired report files but never rewrites the
+    manifest, so links are checked when the manifest is read.
+    """
+    artifacts = summary.get('artifacts', {})
+    expired = sorted(name for name, path in artifacts.items()
+                     if not os.path.exists(os.path.join(report_dir, path)))
+    if not expired:
+        return summary
+    summary = dict(summary)
+    summary['artifacts'] = {name: path for name, path in artifacts.items() if name not in expired}
+    summary['expired_artifacts'] = expired
+    return summary
+
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {'total_runs': 0, 'latest': {}}
+
+
+def write_state(path, state):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def append_entry(manifest_path, state_path, entry):
+    """Append a run and update latest.json"""
+    with open(manifest_path, 'a') as f:
+        f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    state = load_state(state_path)
+    summary = run_summary(entry)
+    state['total_runs'] = state.get('total_runs', 0) + 1
+    state['latest'][entry['schedule']] = summary
+    state['latest']['all'] = summary
+    write_state(state_path, state)
+    return state
+
+
+def main():
+    module_args = dict(
+        action=dict(type='str', choices=['append', 'read'], default='append'),
+        report_dir=dict(type='path', required=True),
+        manifest=dict(type='path'),
+        run_id=dict(type='str'),
+        schedule=dict(type='str', default='manual'),
+        timestamp=dict(type='str', default=''),
+        score=dict(type='float', default=0),
+        devices=dict(type='list', elements='dict', default=[]),
+        artifacts=dict(type='dict', default={}),
+        device_report_prefix=dict(type='str', default=''),
+        device_report_formats=dict(type='list', elements='str', default=[]),
+        recent=dict(type='int', default=50)
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_if=[
+            ('action', 'append', ['run_id'])
+        ],
+        supports_check_mode=True
+    )
+
+    params = module.params
+    result = dict(changed=False)
+
+    manifest_path = params['manifest'] or os.path.join(params['report_dir'], 'manifest.jsonl')
+    state_path = os.path.join(os.path.dirname(manifest_path), 'latest.json')
+
+    try:
+        state = load_state(state_path)
+
+        if params['action'] == 'append':
+            entry = build_entry(params)
+            result['entry'] = run_summary(entry)
+            if not module.check_mode:
+                os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+                state = append_entry(manifest_path, state_path, entry)
+                result['changed'] = True
+
+        report_dir = params['report_dir']
+        result['latest'] = {
+            schedule: existing_artifacts(summary, report_dir)
+            for schedule, summary in state['latest'].items()
+        }
+        result['total_runs'] = state['total_runs']
+        result['recent_runs'] = [
+            existing_artifacts(run_summary(e), report_dir)
+            for e in read_tail(manifest_path, params['recent'])
+        ]
+
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
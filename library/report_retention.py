@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Ansible Module: report_retention
+Apply report retention policies to the reports tree in a single pass.
+
+The reports tree is walked once. Files older than the retention period of
+their schedule (daily, weekly, monthly, manual) are optionally rolled into
+one compressed archive per report date and then deleted in bulk, and
+directories left empty are removed. In check mode nothing is changed and
+the summary shows what would be removed.
+
+Usage in playbook:
+  - name: Apply report retention
+    report_retention:
+      report_dir: /path/to/reports
+      retention:
+        daily: 30
+        weekly: 84
+    register: report_cleanup
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+import os
+import tarfile
+import time
+
+DOCUMENTATION = r'''
+---
+module: report_retention
+short_description: Apply report retention policies to the reports tree
+description:
+    - Walks the reports tree once and selects expired files per schedule
+    - Deletes expired files and empty directories in bulk
+    - Optionally rolls expired files into one compressed archive per report date
+    - Supports check mode for a dry-run summary
+version_added: "1.1.0"
+author:
+    - "Cisco STIG Compliance Automation"
+options:
+    report_dir:
+        description:
+            - Root of the reports tree (contains daily/, weekly/, monthly/, manual/)
+        type: path
+        required: true
+    retention:
+        description:
+            - Retention in days per schedule directory
+            - Schedules not listed are left untouched, 0 keeps files forever
+        type: dict
+        default: {daily: 30, weekly: 84, monthly: 365, manual: 90}
+    archive:
+        description:
+            - Roll expired files into compressed archives before deleting them
+        type: bool
+        default: false
+    archive_dir:
+        description:
+            - Where archives are written as <schedule>/<report date>.tar.<ext>
+            - Defaults to I(report_dir)/archive
+        type: path
+    archive_format:
+        description:
+            - Compression used for archives
+        type: str
+        choices: ['gz', 'bz2', 'xz']
+        default: 'gz'
+    remove_empty_dirs:
+        description:
+            - Remove directories left empty under each schedule directory
+        type: bool
+        default: true
+'''
+
+EXAMPLES = r'''
+- name: Apply report retention
+  delegate_to: localhost
+  run_once: true
+  report_retention:
+    report_dir: "{{ report_dir }}"
+    retention: "{{ report_retention }}"
+  register: report_cleanup
+
+- name: Archive daily reports older than 30 days instead of dropping them
+  report_retention:
+    report_dir: /opt/stig/reports
+    retention:
+      daily: 30
+    archive: true
+    archive_format: xz
+
+- name: Show what would be removed
+  report_retention:
+    report_dir: /opt/stig/reports
+  check_mode: true
+'''
+
+RETURN = r'''
+summary:
+    description: Per-schedule counts of expired files and bytes
+    type: dict
+    returned: always
+    sample:
+        daily: {retention_days: 30, files: 1240, bytes: 52428800, archives: 0}
+removed_files:
+    description: Number of files removed (or that would be removed in check mode)
+    type: int
+    returned: always
+removed_dirs:
+    description: Number of empty directories removed
+    type: int
+    returned: always
+archives:
+    description: Archives written (or that would be written in check mode)
+    type: list
+    returned: always
+    sample:
+        - path: "/reports/archive/daily/2024-01-15.tar.gz"
+          files: 42
+dry_run:
+    description: True when run in check mode
+    type: bool
+    returned: always
+'''
+
+DEFAULT_RETENTION = {'daily': 30, 'weekly': 84, 'monthly': 365, 'manual': 90}
+
+
+def scan_expired(schedule_dir, cutoff):
+    """
+    Walk a schedule directory once, bottom-up.
+
+    Returns:
+        Tuple of (expired, dirs) where expired maps the report date
+        (first path component) to a list of (path, arcname, size) and dirs
+        lists sub-directories deepest first
+    """
+    expired = {}
+    dirs = []
+
+    for root, subdirs, files in os.walk(schedule_dir, topdown=False):
+        rel_root = os.path.relpath(root, schedule_dir)
+        group = rel_root.split(os.sep)[0] if rel_root != os.curdir else ''
+
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.lstat(path)
+            except OSError:
+                continue
+            if stat.st_mtime < cutoff:
+                arcname = os.path.normpath(os.path.join(rel_root, name))
+                expired.setdefault(group, []).append((path, arcname, stat.st_size))
+
+        if root != schedule_dir:
+            dirs.append(root)
+
+    return expired, dirs
+
+
+def archive_path(archive_dir, schedule, group, archive_format):
+    """Archive file for a report date, never overwriting an existing one"""
+    base = os.path.join(archive_dir, schedule, group or schedule)
+    path = f"{base}.tar.{archive_format}"
+    counter = 1
+    while os.path.exists(path):
+        path = f"{base}_{counter}.tar.{archive_format}"
+        counter += 1
+    return path
+
+
+def write_archive(path, entries, archive_format):
+    """Write expired files into a compressed tar"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with tarfile.open(tmp_path, f"w:{archive_format}") as tar:
+        for file_path, arcname, _ in entries:
+            tar.add(file_path, arcname=arcname, recursive=False)
+    os.replace(tmp_path, path)
+
+
+def remove_files(paths):
+    """Delete files, ignoring ones already gone"""
+    removed = 0
+    for path in paths:
+        try:
+            os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def remove_empty_dirs(dirs):
+    """Remove directories (deepest first) that are now empty"""
+    removed = 0
+    for path in dirs:
+        try:
+            os.rmdir(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def apply_retention(report_dir, retention, archive=False, archive_dir=None,
+                    archive_format='gz', prune_dirs=True, dry_run=False, now=None):
+    """
+    Apply retention to every schedule directory under report_dir.
+
+    Returns:
+        Result dict with summary, removed_files, removed_dirs and archives
+    """
+    now = now or time.time()
+    archive_dir = archive_dir or os.path.join(report_dir, 'archive')
+
+    summary = {}
+    archives = []
+    removed_files = 0
+    removed_dirs = 0
+
+    for schedule, days in retention.items():
+        schedule_dir = os.path.join(report_dir, schedule)
+        days = int(days or 0)
+        if days <= 0 or not os.path.isdir(schedule_dir):
+            continue
+
+        expired, dirs = scan_expired(schedule_dir, now - days * 86400)
+        entries = [entry for group in expired.values() for entry in group]
+
+        schedule_summary = {
+            'retention_days': days,
+            'files': len(entries),
+            'bytes': sum(size for _, _, size in entries),
+            'archives': 0
+        }
+
+        if archive:
+            for group in sorted(expired):
+                path = archive_path(archive_dir, schedule, group, archive_format)
+                if not dry_run:
+                    write_archive(path, expired[group], archive_format)
+                archives.append({'path': path, 'files': len(expired[group])})
+                schedule_summary['archives'] += 1
+
+        if dry_run:
+            removed_files += len(entries)
+        else:
+            removed_files += remove_files(path for path, _, _ in entries)
+            if prune_dirs:
+                removed_dirs += remove_empty_dirs(dirs)
+
+        summary[schedule] = schedule_summary
+
+    return {
+        'summary': summary,
+        'removed_files': removed_files,
+        'removed_dirs': removed_dirs,
+        'archives': archives
+    }
+
+
+def main():
+    module_args = dict(
+        report_dir=dict(type='path', required=True),
+        retention=dict(type='dict', default=DEFAULT_RETENTION),
+        archive=dict(type='bool', default=False),
+        archive_dir=dict(type='path'),
+        archive_format=dict(type='str', choices=['gz', 'bz2', 'xz'], default='gz'),
+        remove_empty_dirs=dict(type='bool', default=True)
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    params = module.params
+
+    if not os.path.isdir(params['report_dir']):
+        module.exit_json(changed=False, summary={}, removed_files=0, removed_dirs=0,
+                         archives=[], dry_run=module.check_mode)
+
+    try:
+        result = apply_retention(
+            params['report_dir'],
+            params['retention'],
+            archive=params['archive'],
+            archive_dir=params['archive_dir'],
+            archive_format=params['archive_format'],
+            prune_dirs=params['remove_empty_dirs'],
+            dry_run=module.check_mode
+        )
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+    result['dry_run'] = module.check_mode
+    result['changed'] = result['removed_files'] > 0 or result['removed_dirs'] > 0
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
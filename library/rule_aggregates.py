@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Ansible Module: rule_aggregates
+Build fleet-wide per-rule compliance aggregates.
+
+Folds the results of every device in the run into one row per STIG ID
+(severity, pass/fail/error counts, failing hosts), writes the compact
+aggregate file, and returns the ranked rule views the executive summary
+and rule report render from.
+
+Usage in playbook:
+  - name: Build per-rule aggregates
+    rule_aggregates:
+      devices: "{{ fleet_results }}"
+      dest: /path/to/rule_aggregates.json
+    register: rule_aggregates
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.stig_aggregates import RuleAggregates
+from ansible.module_utils.stig_evaluator import CompactResults, RuleSetEvaluator, STATUS_NAMES
+import os
+
+DOCUMENTATION = r'''
+---
+module: rule_aggregates
+short_description: Build fleet-wide per-rule compliance aggregates
+description:
+    - Aggregates device results per STIG ID in a single pass
+    - Writes a compact indexed aggregate file (host table, rule rows, rank index)
+    - Returns the most frequently failing rules and per-severity totals
+    - Can load a previously written aggregate instead of building one
+version_added: "1.1.0"
+author:
+    - "Cisco STIG Compliance Automation"
+options:
+    devices:
+        description:
+            - Dict of hostname to that device's compliance results
+        type: dict
+        default: {}
+    records:
+        description:
+            - Dict of hostname to compact results (compliance_evaluator result_format=compact)
+            - Read against I(rule_set) without expanding full result dicts
+        type: dict
+        default: {}
+    rule_set:
+        description:
+            - Compiled rule set the compact I(records) were evaluated with
+        type: path
+    src:
+        description:
+            - Existing aggregate file to load; takes precedence over I(devices)
+        type: path
+    dest:
+        description:
+            - Where to write the aggregate file
+        type: path
+    top:
+        description:
+            - Number of most frequently failing rules returned in I(top_failing)
+        type: int
+        default: 10
+    max_hosts:
+        description:
+            - Failing hostnames listed per rule in returned views
+        type: int
+        default: 10
+'''
+
+EXAMPLES = r'''
+- name: Build per-rule aggregates
+  delegate_to: localhost
+  run_once: true
+  rule_aggregates:
+    devices: "{{ dict(ansible_play_hosts | zip(ansible_play_hosts | map('extract', hostvars, 'device_compliance_results'))) }}"
+    dest: "{{ report_output_dir }}/rule_aggregates_{{ report_timestamp }}.json"
+  register: rule_aggregates
+
+- name: Build per-rule aggregates from compact result records
+  rule_aggregates:
+    records: "{{ dict(ansible_play_hosts | zip(ansible_play_hosts | map('extract', hostvars, 'device_compliance_records'))) }}"
+    rule_set: "{{ compiled_rule_set_file }}"
+    dest: "{{ report_output_dir }}/rule_aggregates_{{ report_timestamp }}.json"
+  register: rule_aggregates
+
+- name: Load a stored aggregate
+  rule_aggregates:
+    src: reports/daily/2024-06-01/rule_aggregates_20240601T060000.json
+    top: 25
+  register: rule_aggregates
+'''
+
+RETURN = r'''
+summary:
+    description: Device, rule and failing rule counts plus per-severity totals
+    type: dict
+    returned: always
+top_failing:
+    description: Rules failing on the most devices, most failures first
+    type: list
+    returned: always
+    sample:
+        - stig_id: "CISC-ND-000010"
+          severity: "CAT_II"
+          failed: 412
+          passed: 88
+          fail_percentage: 82.4
+          failing_hosts: ["sw001", "sw002"]
+          more_failing_hosts: 410
+rules:
+    description: Every rule ranked by fail count, in the same shape as I(top_failing)
+    type: list
+    returned: always
+'''
+
+
+def iter_record_results(evaluator, compact):
+    """Minimal result dicts for aggregation, read straight from compact records"""
+    compact = CompactResults.from_dict(compact)
+    if compact.fingerprint != evaluator.fingerprint:
+        raise ValueError('Compact results were produced by a different rule set')
+    for rule, record in zip(evaluator.rules, compact.records):
+        yield {
+            'stig_id': rule.stig_id,
+            'severity': rule.check.get('severity', ''),
+            'title': rule.check.get('title', ''),
+            'category': rule.check.get('category', ''),
+            'compliant': record.compliant,
+            'status': STATUS_NAMES[record.status]
+        }
+
+
+def main():
+    module_args = dict(
+        devices=dict(type='dict', default={}),
+        records=dict(type='dict', default={}),
+        rule_set=dict(type='path'),
+        src=dict(type='path'),
+        dest=dict(type='path'),
+        top=dict(type='int', default=10),
+        max_hosts=dict(type='int', default=10)
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_by={'records': 'rule_set'},
+        supports_check_mode=True
+    )
+
+    params = module.params
+    result = dict(changed=False)
+
+    try:
+        if params['src']:
+            aggregates = RuleAggregates.load(params['src'])
+        else:
+            aggregates = RuleAggregates()
+            for hostname in sorted(params['devices']):
+                aggregates.add_device(hostname, params['devices'][hostname] or [])
+
+            if params['records']:
+                evaluator = RuleSetEvaluator.load(params['rule_set'])
+                for hostname in sorted(params['records']):
+                    if params['records'][hostname]:
+                        aggregates.add_device(hostname, iter_record_results(evaluator, params['records'][hostname]))
+
+        if params['dest'] and not module.check_mode:
+            dest_dir = os.path.dirname(params['dest'])
+            if dest_dir:
+                os.makedirs(dest_dir, exist_ok=True)
+            aggregates.save(params['dest'])
+            result['changed'] = True
+
+        result['summary'] = aggregates.summary()
+        result['top_failing'] = aggregates.top_failing(params['top'], params['max_hosts'])
+        result['rules'] = [aggregates.rule(stig_id, params['max_hosts']) for stig_id in aggregates.ranked()]
+
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
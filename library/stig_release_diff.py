@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Ansible Module: stig_release_diff
+Compare two STIG checklist releases and report which rules changed.
+
+Rules are matched by STIG ID. A rule is changed when its rule_id revision
+(the 'rNNNNNN' part of SV-220518r879887_rule) or any of its check-relevant
+fields differ. When a cached compliance_checks file from the previous run is
+given, checks for unchanged rules are returned for reuse so only added and
+changed rules need to go through mapping again.
+
+Usage in playbook:
+  - name: Diff STIG releases
+    stig_release_diff:
+      old: /path/to/previous.ckl
+      new: /path/to/current.ckl
+      checks_cache: /path/to/compliance_checks.json
+    register: release_diff
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.stig_ckl import CKLParser
+import hashlib
+import json
+import os
+import re
+
+DOCUMENTATION = r'''
+---
+module: stig_release_diff
+short_description: Diff two STIG checklist releases by STIG ID and rule revision
+description:
+    - Parses an old and a new .ckl file and lists added, removed and changed rules
+    - Compares rule_id revisions and check-relevant content
+    - Optionally returns cached compliance checks for unchanged rules so only
+      affected rules need to be mapped again
+version_added: "1.1.0"
+author:
+    - "Cisco STIG Compliance Automation"
+options:
+    old:
+        description:
+            - Path to the previous release .ckl file
+        type: path
+        required: true
+    new:
+        description:
+            - Path to the new release .ckl file
+        type: path
+        required: true
+    checks_cache:
+        description:
+            - JSON file with the compliance_checks built from the previous release
+            - Only reused if it was built from the I(old) checklist (same checksum)
+        type: path
+    mapping_file:
+        description:
+            - STIG to config mapping file; cached checks are only reused if its
+              checksum matches the one stored in the cache
+        type: path
+    compare_fields:
+        description:
+            - Rule fields compared in addition to the rule_id revision
+        type: list
+        elements: str
+        default: ['severity', 'title', 'check_content', 'fix_text']
+'''
+
+EXAMPLES = r'''
+- name: Diff the archived release against the new one
+  stig_release_diff:
+    old: "{{ playbook_dir }}/stig_checklists/archive/cisco_ios_stig_20240101T000000.ckl"
+    new: "{{ stig_source_file }}"
+    checks_cache: "{{ compliance_checks_cache_file }}"
+    mapping_file: "{{ role_path }}/vars/stig_config_mapping.yml"
+  register: release_diff
+'''
+
+RETURN = r'''
+added:
+    description: Rules only in the new release
+    type: list
+    returned: always
+    sample:
+        - stig_id: "CISC-ND-001100"
+          new_rule_id: "SV-220600r900001_rule"
+removed:
+    description: Rules only in the old release
+    type: list
+    returned: always
+changed:
+    description: Rules in both releases whose revision or content changed
+    type: list
+    returned: always
+    sample:
+        - stig_id: "CISC-ND-000010"
+          old_rule_id: "SV-220518r879887_rule"
+          new_rule_id: "SV-220518r916111_rule"
+          changed_fields: ["revision", "check_content"]
+affected_stig_ids:
+    description: STIG IDs of added and changed rules, plus unchanged rules missing from the cache
+    type: list
+    returned: always
+reused_checks:
+    description: Cached checks for unchanged rules (empty if the cache is missing or stale)
+    type: list
+    returned: always
+summary:
+    description: Counts of added, removed, changed and unchanged rules
+    type: dict
+    returned: always
+'''
+
+_RULE_ID_RE = re.compile(r'^(?P<base>.+?)(?P<revision>r\d+)(?:_rule)?$')
+
+
+def split_rule_id(rule_id):
+    """Split 'SV-220518r879887_rule' into ('SV-220518', 'r879887')"""
+    match = _RULE_ID_RE.match(rule_id or '')
+    if not match:
+        return rule_id or '', ''
+    return match.group('base'), match.group('revision')
+
+
+def index_vulns(vulns):
+    """Index parsed vulns by STIG ID, falling back to vuln ID"""
+    indexed = {}
+    for vuln in vulns:
+        key = vuln.get('stig_id') or vuln.get('vuln_id')
+        if key:
+            indexed[key] = vuln
+    return indexed
+
+
+def diff_releases(old_vulns, new_vulns, compare_fields):
+    """
+    Compare two releases.
+
+    Returns:
+        Dict with 'added', 'removed', 'changed' lists and 'unchanged' STIG IDs
+    """
+    old_index = index_vulns(old_vulns)
+    new_index = index_vulns(new_vulns)
+
+    added = []
+    changed = []
+    unchanged = []
+
+    for stig_id, new_vuln in new_index.items():
+        old_vuln = old_index.get(stig_id)
+        if old_vuln is None:
+            added.append({'stig_id': stig_id, 'new_rule_id': new_vuln.get('rule_id', '')})
+            continue
+
+        changed_fields = []
+        if split_rule_id(old_vuln.get('rule_id'))[1] != split_rule_id(new_vuln.get('rule_id'))[1]:
+            changed_fields.append('revision')
+        for field in compare_fields:
+            if (old_vuln.get(field) or '').strip() != (new_vuln.get(field) or '').strip():
+                changed_fields.append(field)
+
+        if changed_fields:
+            changed.append({
+                'stig_id': stig_id,
+                'old_rule_id': old_vuln.get('rule_id', ''),
+                'new_rule_id': new_vuln.get('rule_id', ''),
+                'changed_fields': changed_fields
+            })
+        else:
+            unchanged.append(stig_id)
+
+    removed = [
+        {'stig_id': stig_id, 'old_rule_id': vuln.get('rule_id', '')}
+        for stig_id, vuln in old_index.items()
+        if stig_id not in new_index
+    ]
+
+    return {
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+        'unchanged': unchanged
+    }
+
+
+def file_checksum(path):
+    """SHA1 of a file, matching the checksum reported by the stat module"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_checks_cache(path, mapping_file=None, source_file=None):
+    """
+    Load cached compliance checks.
+
+    The cache is only valid for the checklist it was built from and the
+    mapping it was built with, so both checksums must match.
+
+    Returns:
+        Cache dict with 'stig_ids' (rules that went through mapping) and
+        'checks', or None if the cache is missing or stale
+    """
+    if not path or not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as f:
+        cache = json.load(f)
+
+    if mapping_file and cache.get('mapping_checksum') != file_checksum(mapping_file):
+        return None
+
+    if source_file and cache.get('source_checksum') != file_checksum(source_file):
+        return None
+
+    return cache
+
+
+def main():
+    module_args = dict(
+        old=dict(type='path', required=True),
+        new=dict(type='path', required=True),
+        checks_cache=dict(type='path'),
+        mapping_file=dict(type='path'),
+        compare_fields=dict(type='list', elements='str',
+                            default=['severity', 'title', 'check_content', 'fix_text'])
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    result = dict(changed=False)
+
+    try:
+        old_parser = CKLParser(module.params['old'])
+        old_vulns = old_parser.parse()['vulns']
+
+        new_parser = CKLParser(module.params['new'])
+        new_vulns = new_parser.parse()['vulns']
+
+        diff = diff_releases(old_vulns, new_vulns, module.params['compare_fields'])
+        affected = [r['stig_id'] for r in diff['added']] + [r['stig_id'] for r in diff['changed']]
+        unchanged_set = set(diff['unchanged'])
+
+        result['added'] = diff['added']
+        result['removed'] = diff['removed']
+        result['changed'] = diff['changed']
+        result['affected_stig_ids'] = affected
+        result['summary'] = {
+            'added': len(diff['added']),
+            'removed': len(diff['removed']),
+            'changed': len(diff['changed']),
+            'unchanged': len(diff['unchanged']),
+            'cache_used': False
+        }
+
+        cache = load_checks_cache(
+            module.params['checks_cache'], module.params['mapping_file'], module.params['old']
+        )
+
+        if cache is None:
+            result['reused_checks'] = []
+        else:
+            # Unchanged rules that never went through mapping (e.g. filtered
+            # out by severity last run) still need to be mapped
+            cached_ids = set(cache.get('stig_ids', []))
+            uncached = [stig_id for stig_id in diff['unchanged'] if stig_id not in cached_ids]
+            unchanged_set.difference_update(uncached)
+            affected.extend(uncached)
+
+            result['reused_checks'] = [c for c in cache.get('checks', []) if c.get('stig_id') in unchanged_set]
+            result['summary']['cache_used'] = True
+
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Fleet-wide per-rule compliance aggregates.
+
+Folds every device's results into one row per STIG ID (severity, pass,
+fail and error counts, failing hosts) during the run, so rule-centric
+questions such as "which rules fail on the most devices" are answered
+from the aggregate instead of re-reading every device report.
+
+On disk the aggregate is compact and indexed: hostnames are stored once
+in a host table and rules reference them by position, rows are stored as
+fixed-position lists under a shared field header, and a rank index lists
+STIG IDs by fail count.
+"""
+
+import json
+
+AGGREGATE_FORMAT_VERSION = 1
+
+RULE_FIELDS = ('severity', 'title', 'category', 'passed', 'failed', 'errors', 'failing_hosts')
+
+SEVERITY_ORDER = {'CAT_I': 0, 'CAT_II': 1, 'CAT_III': 2}
+
+
+class RuleAggregates:
+    """Per-rule pass/fail aggregates across a fleet"""
+
+    def __init__(self):
+        self.hosts = []
+        self.host_index = {}
+        # stig_id -> [severity, title, category, passed, failed, errors, [host positions]]
+        self.rules = {}
+
+    def _host_position(self, hostname):
+        position = self.host_index.get(hostname)
+        if position is None:
+            position = len(self.hosts)
+            self.hosts.append(hostname)
+            self.host_index[hostname] = position
+        return position
+
+    def add_device(self, hostname, results):
+        """
+        Fold one device's results into the aggregate.
+
+        Args:
+            hostname: Device hostname
+            results: Device result dicts (stig_id, severity, compliant, status)
+        """
+        position = self._host_position(hostname)
+        for result in results:
+            stig_id = result.get('stig_id')
+            if not stig_id:
+                continue
+
+            row = self.rules.get(stig_id)
+            if row is None:
+                row = [result.get('severity', ''), result.get('title', ''),
+                       result.get('category', ''), 0, 0, 0, []]
+                self.rules[stig_id] = row
+
+            if result.get('compliant'):
+                row[3] += 1
+            elif result.get('status') == 'Error':
+                row[5] += 1
+            else:
+                row[4] += 1
+                row[6].append(position)
+
+    def ranked(self):
+        """STIG IDs by fail count, then severity, then ID"""
+        return sorted(
+            self.rules,
+            key=lambda stig_id: (-self.rules[stig_id][4],
+                                 SEVERITY_ORDER.get(self.rules[stig_id][0], 3),
+                                 stig_id)
+        )
+
+    def rule(self, stig_id, max_hosts=None):
+        """Expanded view of one rule with failing hostnames"""
+        severity, title, category, passed, failed, errors, positions = self.rules[stig_id]
+        shown = positions if max_hosts is None else positions[:max_hosts]
+        evaluated = passed + failed + errors
+        return {
+            'stig_id': stig_id,
+            'severity': severity,
+            'title': title,
+            'category': category,
+            'passed': passed,
+            'failed': failed,
+            'errors': errors,
+            'fail_percentage': round(failed / evaluated * 100, 2) if evaluated else 0,
+            'failing_hosts': [self.hosts[p] for p in shown],
+            'more_failing_hosts': len(positions) - len(shown)
+        }
+
+    def top_failing(self, count=10, max_hosts=10):
+        """Rules failing on the most devices (rules with no failures are skipped)"""
+        top = []
+        for stig_id in self.ranked():
+            if len(top) == count or self.rules[stig_id][4] == 0:
+                break
+            top.append(self.rule(stig_id, max_hosts))
+        return top
+
+    def severity_summary(self):
+        """Per-severity counts of rules and failures"""
+        summary = {}
+        for severity, _, _, passed, failed, errors, _ in self.rules.values():
+            entry = summary.setdefault(severity or 'UNKNOWN', {
+                'rules': 0, 'failing_rules': 0, 'failures': 0, 'passes': 0, 'errors': 0
+            })
+            entry['rules'] += 1
+            entry['failing_rules'] += 1 if failed else 0
+            entry['failures'] += failed
+            entry['passes'] += passed
+            entry['errors'] += errors
+        return summary
+
+    def summary(self):
+        return {
+            'devices': len(self.hosts),
+            'rules': len(self.rules),
+            'failing_rules': sum(1 for row in self.rules.values() if row[4]),
+            'by_severity': self.severity_summary()
+        }
+
+    # Serialization --------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            'format_version': AGGREGATE_FORMAT_VERSION,
+            'fields': list(RULE_FIELDS),
+            'hosts': self.hosts,
+            'rules': self.rules,
+            'rank': self.ranked()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('format_version') != AGGREGATE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported rule aggregate format: {data.get('format_version')}")
+        aggregates = cls()
+        aggregates.hosts = list(data['hosts'])
+        aggregates.host_index = {hostname: i for i, hostname in enumerate(aggregates.hosts)}
+        aggregates.rules = {stig_id: list(row) for stig_id, row in data['rules'].items()}
+        return aggregates
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self):
+        return len(self.rules)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+STIG Viewer checklist (.ckl) parsing shared by the STIG modules.
+
+CKL files are XML-based STIG Viewer checklists containing:
+- STIG metadata (title, version, release)
+- Individual vulnerability checks (VULN elements)
+- Status information (Open, NotAFinding, Not_Applicable)
+
+CKLTemplate writes populated checklists back out for STIG Viewer.
+"""
+
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+import re
+
+
+class CKLParser:
+    """Parser for DISA STIG Viewer .ckl files"""
+
+    # Mapping of severity values to categories
+    SEVERITY_MAP = {
+        'high': 'CAT_I',
+        'medium': 'CAT_II',
+        'low': 'CAT_III',
+        'cat_i': 'CAT_I',
+        'cat_ii': 'CAT_II',
+        'cat_iii': 'CAT_III',
+        'i': 'CAT_I',
+        'ii': 'CAT_II',
+        'iii': 'CAT_III',
+        '1': 'CAT_I',
+        '2': 'CAT_II',
+        '3': 'CAT_III'
+    }
+
+    # Common Cisco IOS command patterns for extraction
+    COMMAND_PATTERNS = [
+        r'^\s*(no\s+)?[a-z][\w\-]+(\s+[\w\-./]+)*\s*$',  # Basic commands
+        r'^\s*(interface|line|router|aaa|ip|snmp|logging|ntp|banner|service)\s+.*$',
+        r'^\s*(enable\s+secret|username|crypto|access-list)\s+.*$'
+    ]
+
+    def __init__(self, ckl_path):
+        self.ckl_path = ckl_path
+        self.tree = None
+        self.root = None
+        self.stig_info = {}
+        self.vulns = []
+
+    def parse(self):
+        """Parse the CKL file and extract all vulnerability data"""
+        try:
+            self.tree = ET.parse(self.ckl_path)
+            self.root = self.tree.getroot()
+        except ET.ParseError as e:
+            raise ValueError(f"Failed to parse CKL file: {e}")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"CKL file not found: {self.ckl_path}")
+
+        self._extract_stig_info()
+        self._extract_vulns()
+
+        return {
+            'stig_info': self.stig_info,
+            'vulns': self.vulns,
+            'summary': self._generate_summary()
+        }
+
+    def _extract_stig_info(self):
+        """Extract STIG metadata from the checklist"""
+        # Try to find STIG_INFO element
+        stig_info_elem = self.root.find('.//STIG_INFO')
+
+        if stig_info_elem is not None:
+            for si_data in stig_info_elem.findall('SI_DATA'):
+                sid_name = si_data.find('SID_NAME')
+                sid_data = si_data.find('SID_DATA')
+
+                if sid_name is not None and sid_name.text:
+                    name = sid_name.text.lower().replace(' ', '_')
+                    value = sid_data.text if sid_data is not None else ''
+                    self.stig_info[name] = value
+
+        # Also try alternate locations
+        if not self.stig_info:
+            # Try to extract from iSTIG
+            istig = self.root.find('.//iSTIG')
+            if istig is not None:
+                stig_info = istig.find('STIG_INFO')
+                if stig_info is not None:
+                    for si_data in stig_info.findall('SI_DATA'):
+                        sid_name = si_data.find('SID_NAME')
+                        sid_data = si_data.find('SID_DATA')
+                        if sid_name is not None and sid_name.text:
+                            name = sid_name.text.lower().replace(' ', '_')
+                            value = sid_data.text if sid_data is not None else ''
+                            self.stig_info[name] = value
+
+    def _extract_vulns(self):
+        """Extract all vulnerability entries from the checklist"""
+        # Find all VULN elements
+        for vuln in self.root.findall('.//VULN'):
+            vuln_data = self._parse_vuln(vuln)
+            if vuln_data:
+                self.vulns.append(vuln_data)
+
+    def _parse_vuln(self, vuln_elem):
+        """Parse a single VULN element"""
+        vuln_data = {
+            'vuln_id': '',
+            'rule_id': '',
+            'stig_id': '',
+            'severity': '',
+            'title': '',
+            'description': '',
+            'check_content': '',
+            'fix_text': '',
+            'fix_commands': [],
+            'status': '',
+            'comments': '',
+            'finding_details': ''
+        }
+
+        # Extract STIG_DATA elements
+        for stig_data in vuln_elem.findall('STIG_DATA'):
+            vuln_attribute = stig_data.find('VULN_ATTRIBUTE')
+            attribute_data = stig_data.find('ATTRIBUTE_DATA')
+
+            if vuln_attribute is None or vuln_attribute.text is None:
+                continue
+
+            attr_name = vuln_attribute.text.lower()
+            attr_value = attribute_data.text if attribute_data is not None else ''
+
+            # Map the attribute to our data structure
+            if attr_name == 'vuln_num':
+                vuln_data['vuln_id'] = attr_value
+            elif attr_name == 'rule_id':
+                vuln_data['rule_id'] = attr_value
+            elif attr_name == 'rule_ver' or attr_name == 'stig_id':
+                vuln_data['stig_id'] = attr_value
+            elif attr_name == 'severity':
+                vuln_data['severity'] = self._normalize_severity(attr_value)
+            elif attr_name == 'rule_title':
+                vuln_data['title'] = attr_value
+            elif attr_name == 'vuln_discuss' or attr_name == 'discussion':
+                vuln_data['description'] = attr_value
+            elif attr_name == 'check_content':
+                vuln_data['check_content'] = attr_value
+            elif attr_name == 'fix_text':
+                vuln_data['fix_text'] = attr_value
+
+        # Extract STATUS
+        status_elem = vuln_elem.find('STATUS')
+        if status_elem is not None and status_elem.text:
+            vuln_data['status'] = status_elem.text
+
+        # Extract COMMENTS
+        comments_elem = vuln_elem.find('COMMENTS')
+        if comments_elem is not None and comments_elem.text:
+            vuln_data['comments'] = comments_elem.text
+
+        # Extract FINDING_DETAILS
+        finding_elem = vuln_elem.find('FINDING_DETAILS')
+        if finding_elem is not None and finding_elem.text:
+            vuln_data['finding_details'] = finding_elem.text
+
+        return vuln_data
+
+    def _normalize_severity(self, severity):
+        """Normalize severity value to CAT_I/II/III format"""
+        if not severity:
+            return 'CAT_III'
+
+        severity_lower = severity.lower().strip()
+        return self.SEVERITY_MAP.get(severity_lower, 'CAT_III')
+
+    def extract_fix_commands(self, fix_text):
+        """Extract potential CLI commands from fix text"""
+        if not fix_text:
+            return []
+
+        commands = []
+        lines = fix_text.split('\n')
+
+        for line in lines:
+            line = line.strip()
+
+            # Skip empty lines and common non-command text
+            if not line:
+                continue
+            if line.startswith('#') or line.startswith('!'):
+                continue
+            if any(line.lower().startswith(x) for x in ['note:', 'example:', 'verify', 'check', 'ensure']):
+                continue
+
+            # Check against command patterns
+            for pattern in self.COMMAND_PATTERNS:
+                if re.match(pattern, line, re.IGNORECASE):
+                    # Clean up the command
+                    cmd = line.strip()
+                    if cmd and len(cmd) > 3:
+                        commands.append(cmd)
+                    break
+
+        return list(dict.fromkeys(commands))  # Remove duplicates while preserving order
+
+    def _generate_summary(self):
+        """Generate summary statistics"""
+        return self.summarize(self.vulns, self.stig_info)
+
+    @staticmethod
+    def summarize(vulns, stig_info):
+        """Generate summary statistics for a list of vulns"""
+        summary = {
+            'total_vulns': len(vulns),
+            'cat_i_count': 0,
+            'cat_ii_count': 0,
+            'cat_iii_count': 0,
+            'by_status': {},
+            'stig_title': stig_info.get('title', 'Unknown'),
+            'stig_version': stig_info.get('version', 'Unknown'),
+            'stig_release': stig_info.get('releaseinfo', 'Unknown')
+        }
+
+        for vuln in vulns:
+            severity = vuln.get('severity', '')
+            status = vuln.get('status', 'Not_Reviewed')
+
+            if severity == 'CAT_I':
+                summary['cat_i_count'] += 1
+            elif severity == 'CAT_II':
+                summary['cat_ii_count'] += 1
+            elif severity == 'CAT_III':
+                summary['cat_iii_count'] += 1
+
+            summary['by_status'][status] = summary['by_status'].get(status, 0) + 1
+
+        return summary
+
+
+# Result status -> STIG Viewer STATUS value
+CKL_STATUS_MAP = {
+    'Compliant': 'NotAFinding',
+    'Non-Compliant': 'Open',
+    'Not Applicable': 'Not_Applicable',
+    'Error': 'Not_Reviewed',
+    'Not Checked': 'Not_Reviewed'
+}
+
+_VULN_RE = re.compile(r'<VULN>.*?</VULN>', re.DOTALL)
+_STIG_DATA_RE = re.compile(
+    r'<VULN_ATTRIBUTE>\s*(Vuln_Num|Rule_Ver)\s*</VULN_ATTRIBUTE>\s*'
+    r'<ATTRIBUTE_DATA>(.*?)</ATTRIBUTE_DATA>',
+    re.DOTALL
+)
+_FIELD_RES = {
+    field: re.compile(rf'<{field}>.*?</{field}>|<{field}\s*/>', re.DOTALL)
+    for field in ('STATUS', 'FINDING_DETAILS', 'COMMENTS')
+}
+_ASSET_FIELD_RES = {
+    field: re.compile(rf'<{field}>.*?</{field}>|<{field}\s*/>', re.DOTALL)
+    for field in ('HOST_NAME', 'HOST_IP', 'HOST_FQDN')
+}
+
+
+class CKLTemplate:
+    """
+    A template checklist split into literal text and fillable slots.
+
+    The template is scanned once with regexes; writing a device checklist
+    only concatenates the literal chunks with escaped values, so no XML tree
+    is built per device and output is streamed straight to the file.
+    """
+
+    def __init__(self, template_path):
+        with open(template_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+        # Parts are either literal strings or (field, stig_id, vuln_id,
+        # template text) slots
+        self.parts = []
+        self.vuln_count = 0
+
+        # ASSET fields come before the first VULN (or anywhere if there is none)
+        first_vuln = text.find('<VULN>')
+        asset_end = first_vuln if first_vuln >= 0 else len(text)
+
+        position = 0
+        for field, regex in _ASSET_FIELD_RES.items():
+            match = regex.search(text, position, asset_end)
+            if match:
+                self.parts.append(text[position:match.start()])
+                self.parts.append((field, None, None, match.group(0)))
+                position = match.end()
+
+        for vuln_match in _VULN_RE.finditer(text, position):
+            block = vuln_match.group(0)
+            keys = dict(
+                (name, value.strip())
+                for name, value in _STIG_DATA_RE.findall(block)
+            )
+            stig_id = keys.get('Rule_Ver', '')
+            vuln_id = keys.get('Vuln_Num', '')
+
+            spans = []
+            for field, regex in _FIELD_RES.items():
+                field_match = regex.search(block)
+                if field_match:
+                    spans.append((field_match.start(), field_match.end(), field))
+            spans.sort()
+
+            block_start = vuln_match.start()
+            for start, end, field in spans:
+                self.parts.append(text[position:block_start + start])
+                self.parts.append((field, stig_id, vuln_id, block[start:end]))
+                position = block_start + end
+            self.vuln_count += 1
+
+        self.parts.append(text[position:])
+
+    def write(self, dest, results, hostname='', host_ip='', host_fqdn='', comment=''):
+        """
+        Write a populated checklist for one device.
+
+        Args:
+            dest: Output .ckl path
+            results: List of result dicts (device_compliance_results)
+            hostname, host_ip, host_fqdn: ASSET values
+            comment: Text written to COMMENTS of every evaluated rule
+
+        Rules without a result keep the template's STATUS, FINDING_DETAILS
+        and COMMENTS unchanged.
+
+        Returns:
+            Dict with counts of 'evaluated' and 'not_reviewed' rules
+        """
+        by_stig_id = {}
+        by_vuln_id = {}
+        for result in results:
+            if result.get('stig_id'):
+                by_stig_id[result['stig_id']] = result
+            if result.get('vuln_id'):
+                by_vuln_id[result['vuln_id']] = result
+
+        asset = {'HOST_NAME': hostname, 'HOST_IP': host_ip, 'HOST_FQDN': host_fqdn}
+        evaluated = set()
+
+        with open(dest, 'w', encoding='utf-8') as out:
+            for part in self.parts:
+                if isinstance(part, str):
+                    out.write(part)
+                    continue
+
+                field, stig_id, vuln_id, original = part
+                if stig_id is None:
+                    out.write(f'<{field}>{escape(asset[field] or "")}</{field}>')
+                    continue
+
+                result = by_stig_id.get(stig_id) or by_vuln_id.get(vuln_id)
+                if result is None:
+                    out.write(original)
+                    continue
+
+                evaluated.add(stig_id or vuln_id)
+                value = self._field_value(field, result, comment)
+                out.write(f'<{field}>{escape(value)}</{field}>')
+
+        return {
+            'evaluated': len(evaluated),
+            'not_reviewed': self.vuln_count - len(evaluated)
+        }
+
+    @staticmethod
+    def _field_value(field, result, comment):
+        """Value for a STATUS, FINDING_DETAILS or COMMENTS slot"""
+        if field == 'STATUS':
+            return CKL_STATUS_MAP.get(result.get('status'), 'Not_Reviewed')
+        if field == 'FINDING_DETAILS':
+            details = result.get('details', '')
+            current = result.get('current_config', '')
+            if current:
+                return f"{details}\n\nCurrent configuration:\n{current}"
+            return details
+        return comment
@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+Compiled STIG rule-set evaluator.
+
+Turns the ``compliance_checks`` list built by the stig_parser role into a
+single evaluator object. All per-rule work that used to happen in Jinja on
+every device (lower-casing, whitespace normalization, regex construction)
+is done once at compile time, and rules are grouped by the show command
+they read so each command output is prepared only once per device.
+
+The compiled rule set is plain data (``to_dict``/``from_dict``), so it can
+be written to disk once per play and loaded by every worker process.
+Compiled regexes cannot be serialized, so loading compiles the patterns
+again; ``load_rule_set`` keeps one evaluator per file version so a process
+that loads the same rule set repeatedly only compiles it once.
+
+Results can also be kept compact: one slotted ``ResultRecord`` per rule
+holding only the per-device facts (status code, details code and argument,
+index into a per-device table of command outputs). Everything else comes
+from the shared rule definition when ``expand`` builds the full dicts at
+render time.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+from functools import lru_cache
+
+RULE_SET_FORMAT_VERSION = 1
+
+COMPACT_RESULTS_FORMAT_VERSION = 1
+
+# Result status codes
+STATUS_COMPLIANT = 0
+STATUS_NON_COMPLIANT = 1
+STATUS_ERROR = 2
+
+STATUS_NAMES = ('Compliant', 'Non-Compliant', 'Error')
+
+# Details codes. The argument is a list of expected/prohibited line indexes
+# for MISSING and VIOLATIONS, an error message for EXECUTION_FAILED and
+# unused otherwise.
+DETAIL_ALL_FOUND = 0
+DETAIL_MISSING = 1
+DETAIL_PATTERN_NOT_FOUND = 2
+DETAIL_NONE_PROHIBITED = 3
+DETAIL_VIOLATIONS = 4
+DETAIL_PATTERN_MATCHED = 5
+DETAIL_UNSUPPORTED = 6
+DETAIL_EXECUTION_FAILED = 7
+
+RUNNING_CONFIG_COMMAND = 'show running-config'
+
+# Matches "show running-config | include <regex>" / "| section <regex>"
+_PIPE_FILTER_RE = re.compile(
+    r'^\s*show\s+running-config\s*\|\s*(include|section)\s+(.+?)\s*$',
+    re.IGNORECASE
+)
+
+
+def normalize_line(line):
+    """Collapse all whitespace runs to a single space"""
+    return ' '.join(line.split())
+
+
+def iter_lines(config):
+    """
+    Stream lines from configuration text without splitting it up front.
+
+    Accepts a string, a bytes-like buffer (bytes, mmap) or a MappedConfig.
+    Yields the same lines as ``config.split('\\n')``.
+    """
+    if config is None:
+        return
+    if isinstance(config, MappedConfig):
+        config = config.buffer
+
+    decode = not isinstance(config, str)
+    newline = b'\n' if decode else '\n'
+
+    start = 0
+    while True:
+        end = config.find(newline, start)
+        line = config[start:] if end == -1 else config[start:end]
+        yield line.decode('utf-8', 'replace') if decode else line
+        if end == -1:
+            return
+        start = end + 1
+
+
+class MappedConfig:
+    """
+    Read-only memory-mapped view of a saved configuration file.
+
+    Lines are streamed from the mapping with ``iter_lines``; the full text
+    is only decoded when something needs it as one string.
+
+    Usage:
+        with MappedConfig(path) as config:
+            results = evaluator.evaluate(config)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = self._file.seek(0, 2)
+        # mmap cannot map an empty file
+        self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._text = None
+
+    def text(self):
+        if self._text is None:
+            self._text = self.buffer[:].decode('utf-8', 'replace')
+        return self._text
+
+    def sha1(self):
+        return hashlib.sha1(self.buffer).hexdigest()
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def latest_running_config(device_dir):
+    """Newest saved running config in a device backup directory, or None"""
+    candidates = [
+        os.path.join(device_dir, name)
+        for name in os.listdir(device_dir)
+        if name.endswith('.cfg') and '_startup_' not in name
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def derive_command_outputs(commands, running_config):
+    """
+    Derive the outputs of several running-config show commands in one pass.
+
+    Supports plain ``show running-config`` and the ``| include`` and
+    ``| section`` output filters, which is what the STIG mappings use. All
+    filters are applied while streaming the config once.
+
+    Args:
+        commands: Show commands as written in the check mapping
+        running_config: Configuration as text or MappedConfig
+
+    Returns:
+        Dict of command -> output string, or None if it cannot be derived
+    """
+    derived = {}
+    includes = []
+    sections = []
+    full = []
+
+    for command in commands:
+        derived[command] = None
+        if running_config is None:
+            continue
+        if normalize_line(command).lower() == RUNNING_CONFIG_COMMAND:
+            full.append(command)
+            continue
+        match = _PIPE_FILTER_RE.match(command)
+        if not match:
+            continue
+        try:
+            regex = re.compile(match.group(2))
+        except re.error:
+            continue
+        if match.group(1).lower() == 'include':
+            includes.append((command, regex, []))
+        else:
+            # [command, regex, result, current block, block matches]
+            sections.append([command, regex, [], [], False])
+
+    if includes or sections:
+        for line in iter_lines(running_config):
+            for _command, regex, result in includes:
+                if regex.search(line):
+                    result.append(line)
+
+            indented = line[:1] in (' ', '\t')
+            for section in sections:
+                if indented:
+                    section[3].append(line)
+                    section[4] = section[4] or bool(section[1].search(line))
+                    continue
+                if section[4]:
+                    section[2].extend(section[3])
+                section[3] = [line]
+                section[4] = bool(section[1].search(line))
+
+        for command, _regex, result in includes:
+            derived[command] = '\n'.join(result)
+        for command, _regex, result, block, block_matches in sections:
+            if block_matches:
+                result.extend(block)
+            derived[command] = '\n'.join(result)
+
+    if full:
+        text = running_config.text() if isinstance(running_config, MappedConfig) else running_config
+        for command in full:
+            derived[command] = text
+
+    return derived
+
+
+def derive_command_output(command, running_config):
+    """
+    Derive the output of a running-config show command offline.
+
+    Args:
+        command: Show command as written in the check mapping
+        running_config: Configuration as text or MappedConfig
+
+    Returns:
+        Command output string, or None if the command cannot be derived
+    """
+    return derive_command_outputs([command], running_config)[command]
+
+
+def merge_results(stored, updated, removed_stig_ids=()):
+    """
+    Merge re-evaluated rule results into a device's stored results.
+
+    Stored results keep their order; a result for an updated STIG ID is
+    replaced in place, results for removed STIG IDs are dropped and results
+    for rules not stored yet are appended.
+
+    Args:
+        stored: Stored result dicts of one device
+        updated: Re-evaluated result dicts
+        removed_stig_ids: STIG IDs no longer in the rule set
+
+    Returns:
+        Merged list of result dicts
+    """
+    pending = {result['stig_id']: result for result in updated}
+    removed = set(removed_stig_ids)
+    merged = []
+    for result in stored:
+        stig_id = result.get('stig_id')
+        if stig_id in removed:
+            continue
+        merged.append(pending.pop(stig_id, result))
+    merged.extend(result for result in updated if result['stig_id'] in pending)
+    return merged
+
+
+class CompiledRule:
+    """A single compliance check with all patterns prepared"""
+
+    __slots__ = (
+        'check', 'stig_id', 'check_type', 'command',
+        'present_needles', 'present_patterns',
+        'absent_patterns', 'check_regex', 'regex'
+    )
+
+    def __init__(self, check):
+        self.check = check
+        self.stig_id = check.get('stig_id', '')
+        self.check_type = check.get('check_type', 'present')
+        self.command = check.get('check_command') or RUNNING_CONFIG_COMMAND
+        self.check_regex = check.get('check_regex') or ''
+        self.regex = re.compile(self.check_regex) if self.check_regex else None
+
+        # (original line, normalized lower-case needle)
+        self.present_needles = [
+            (expected, normalize_line(expected).lower())
+            for expected in check.get('expected_config') or []
+        ]
+        self.present_patterns = [
+            re.compile(re.escape(expected.strip()).replace(r'\ +', r'\s+'),
+                       re.IGNORECASE | re.MULTILINE)
+            for expected in check.get('expected_config') or []
+        ]
+
+        # (original line, violation message, compiled pattern)
+        self.absent_patterns = []
+        for prohibited in check.get('prohibited_config') or []:
+            if prohibited.lower().startswith('no '):
+                base_config = prohibited[3:].strip()
+                pattern = re.compile(rf'^(?!no\s+){re.escape(base_config)}',
+                                     re.IGNORECASE | re.MULTILINE)
+                message = f"Found '{base_config}' (should have 'no' prefix)"
+            else:
+                pattern = re.compile(
+                    re.escape(prohibited.strip()).replace(r'\ +', r'\s+'),
+                    re.IGNORECASE | re.MULTILINE
+                )
+                message = prohibited
+            self.absent_patterns.append((prohibited, message, pattern))
+
+    def evaluate_code(self, output, normalized_output):
+        """
+        Evaluate the rule against one command output.
+
+        Args:
+            output: Raw command output
+            normalized_output: Whitespace-normalized, lower-cased output
+
+        Returns:
+            Tuple of (compliant, details code, details argument)
+        """
+        if self.check_type == 'present':
+            missing = []
+            for index, ((_expected, needle), pattern) in enumerate(zip(self.present_needles, self.present_patterns)):
+                if not output or (needle not in normalized_output and not pattern.search(output)):
+                    missing.append(index)
+
+            if missing:
+                return False, DETAIL_MISSING, missing
+            if self.regex is not None and not self.regex.search(output):
+                return False, DETAIL_PATTERN_NOT_FOUND, None
+            return True, DETAIL_ALL_FOUND, None
+
+        if self.check_type == 'absent':
+            violations = []
+            if output:
+                for index, (_prohibited, _message, pattern) in enumerate(self.absent_patterns):
+                    if pattern.search(output):
+                        violations.append(index)
+
+            if violations:
+                return False, DETAIL_VIOLATIONS, violations
+            return True, DETAIL_NONE_PROHIBITED, None
+
+        if self.check_type == 'regex':
+            if self.regex is not None and self.regex.search(output):
+                return True, DETAIL_PATTERN_MATCHED, None
+            return False, DETAIL_PATTERN_NOT_FOUND, None
+
+        return False, DETAIL_UNSUPPORTED, None
+
+    def evaluate(self, output, normalized_output):
+        """
+        Evaluate the rule against one command output.
+
+        Returns:
+            Tuple of (compliant, details)
+        """
+        compliant, code, arg = self.evaluate_code(output, normalized_output)
+        return compliant, self.describe(code, arg)
+
+    def describe(self, code, arg=None):
+        """Details text for a details code"""
+        if code == DETAIL_ALL_FOUND:
+            return 'All required configurations found'
+        if code == DETAIL_MISSING:
+            return 'Missing configurations: ' + ', '.join(self.present_needles[i][0] for i in arg)
+        if code == DETAIL_PATTERN_NOT_FOUND:
+            return 'Pattern not found: ' + self.check_regex
+        if code == DETAIL_NONE_PROHIBITED:
+            return 'No prohibited configurations found'
+        if code == DETAIL_VIOLATIONS:
+            return 'Violations found: ' + ', '.join(self.absent_patterns[i][1] for i in arg)
+        if code == DETAIL_PATTERN_MATCHED:
+            return 'Pattern matched'
+        if code == DETAIL_EXECUTION_FAILED:
+            return 'Check execution failed: ' + arg
+        return f"Unsupported check type: {self.check_type}"
+
+    def result(self, compliant, status, details, current_config):
+        """Build a result dict in the shape execute_check.yml produced"""
+        check = self.check
+        return {
+            'stig_id': self.stig_id,
+            'vuln_id': check.get('vuln_id', ''),
+            'severity': check.get('severity', ''),
+            'title': check.get('title', ''),
+            'category': check.get('category', ''),
+            'compliant': compliant,
+            'status': status,
+            'details': details,
+            'current_config': current_config,
+            'expected_config': check.get('expected_config') or [],
+            'fix_commands': check.get('fix_commands') or []
+        }
+
+
+class ResultRecord:
+    """Per-device facts of one rule result; the rule is implied by position"""
+
+    __slots__ = ('status', 'detail', 'arg', 'output')
+
+    def __init__(self, status, detail, arg=None, output=None):
+        self.status = status
+        self.detail = detail
+        self.arg = arg
+        # Index into CompactResults.outputs, or None for no output
+        self.output = output
+
+    @property
+    def compliant(self):
+        return self.status == STATUS_COMPLIANT
+
+    def to_list(self):
+        return [self.status, self.detail, self.arg, self.output]
+
+    @classmethod
+    def from_list(cls, data):
+        return cls(*data)
+
+
+class CompactResults:
+    """
+    All rule results for one device.
+
+    ``records`` follow the compiled rule order of the rule set identified by
+    ``fingerprint``; each command output is stored once in ``outputs``.
+    """
+
+    __slots__ = ('fingerprint', 'records', 'outputs')
+
+    def __init__(self, fingerprint, records=None, outputs=None):
+        self.fingerprint = fingerprint
+        self.records = records or []
+        self.outputs = outputs or []
+
+    def summarize(self):
+        """Summary counts matching device_compliance_summary"""
+        total = len(self.records)
+        compliant = sum(1 for r in self.records if r.status == STATUS_COMPLIANT)
+        errors = sum(1 for r in self.records if r.status == STATUS_ERROR)
+        return {
+            'total_checks': total,
+            'compliant': compliant,
+            'non_compliant': total - compliant,
+            'errors': errors,
+            'compliance_percentage': round(compliant / total * 100, 2) if total else 0
+        }
+
+    def to_dict(self):
+        return {
+            'format_version': COMPACT_RESULTS_FORMAT_VERSION,
+            'fingerprint': self.fingerprint,
+            'records': [record.to_list() for record in self.records],
+            'outputs': self.outputs
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        version = data.get('format_version')
+        if version != COMPACT_RESULTS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact results format version: {version}")
+        return cls(
+            data.get('fingerprint'),
+            [ResultRecord.from_list(record) for record in data.get('records', [])],
+            list(data.get('outputs', []))
+        )
+
+
+class RuleSetEvaluator:
+    """Evaluate a compiled STIG rule set against a device in one call"""
+
+    def __init__(self, checks, categories=None):
+        """
+        Compile a list of compliance checks.
+
+        Args:
+            checks: List of check dicts as built by build_check_mapping.yml
+            categories: Optional ordered list of enabled categories. Checks in
+                other categories are dropped, and the remaining checks are
+                ordered by category the same way check_category.yml runs them.
+        """
+        checks = list(checks or [])
+        if categories is not None:
+            categories = list(categories)
+            order = {name: index for index, name in enumerate(categories)}
+            checks = [c for c in checks if c.get('category') in order]
+            checks.sort(key=lambda c: order[c.get('category')])
+
+        self.categories = categories
+        self.rules = [CompiledRule(check) for check in checks]
+        self._fingerprint = None
+
+        # Rules grouped by the command they read, in first-seen order
+        self.groups = {}
+        for rule in self.rules:
+            self.groups.setdefault(rule.command, []).append(rule)
+
+    @property
+    def fingerprint(self):
+        """
+        Identifies the rules compact results were evaluated against.
+
+        Hashes the canonical JSON of every rule's check in compiled order, so
+        a changed check pattern, detail text or fix invalidates stored
+        records just like a changed rule order does.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for rule in self.rules:
+                digest.update(json.dumps(rule.check, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+                digest.update(b'\0')
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def commands(self):
+        """Unique show commands needed by the rule set"""
+        return list(self.groups)
+
+    def device_commands(self):
+        """Commands that cannot be derived from the running config"""
+        return [cmd for cmd in self.groups if derive_command_output(cmd, '') is None]
+
+    def subset(self, stig_ids):
+        """Return a new evaluator restricted to the given STIG IDs"""
+        wanted = set(stig_ids)
+        evaluator = RuleSetEvaluator([rule.check for rule in self.rules if rule.stig_id in wanted])
+        evaluator.categories = self.categories
+        return evaluator
+
+    def offline_subset(self):
+        """
+        Split the rule set for offline evaluation from saved configs.
+
+        Returns:
+            Tuple of (evaluator with rules derivable from running-config,
+            list of STIG IDs that need a device command)
+        """
+        device_commands = set(self.device_commands())
+        offline = [rule.check for rule in self.rules if rule.command not in device_commands]
+        device_only = [rule.stig_id for rule in self.rules if rule.command in device_commands]
+        evaluator = RuleSetEvaluator(offline)
+        evaluator.categories = self.categories
+        return evaluator, device_only
+
+    def evaluate_compact(self, running_config=None, outputs=None, errors=None):
+        """
+        Evaluate every rule for one device into compact records.
+
+        Args:
+            running_config: Full running configuration as text or a
+                MappedConfig. Used to derive the output of any running-config
+                command not in ``outputs``.
+            outputs: Optional dict of show command -> output text
+            errors: Optional dict of show command -> error message for
+                commands that failed on the device
+
+        A rule whose command failed on the device, or whose output cannot
+        be derived, gets status Error rather than being evaluated against
+        empty output as the per-check tasks did. Errors count as
+        non-compliant and are reported separately in the summary.
+
+        Returns:
+            CompactResults with one record per rule, in compiled order
+        """
+        outputs = outputs or {}
+        errors = errors or {}
+        by_rule = {}
+        output_table = []
+
+        # Every derivable output comes from a single pass over the config
+        derived = derive_command_outputs(
+            [command for command in self.groups if command not in outputs],
+            running_config
+        )
+
+        for command, rules in self.groups.items():
+            if command in outputs:
+                output = outputs[command] or ''
+            else:
+                output = derived[command]
+
+            if output is None:
+                message = errors.get(command, f"No output for command '{command}'")
+                for rule in rules:
+                    by_rule[id(rule)] = ResultRecord(STATUS_ERROR, DETAIL_EXECUTION_FAILED, message)
+                continue
+
+            output_ref = None
+            if output:
+                output_ref = len(output_table)
+                output_table.append(output)
+
+            normalized_output = normalize_line(output).lower()
+            for rule in rules:
+                compliant, code, arg = rule.evaluate_code(output, normalized_output)
+                by_rule[id(rule)] = ResultRecord(
+                    STATUS_COMPLIANT if compliant else STATUS_NON_COMPLIANT,
+                    code, arg, output_ref
+                )
+
+        return CompactResults(
+            self.fingerprint,
+            [by_rule[id(rule)] for rule in self.rules],
+            output_table
+        )
+
+    def expand(self, compact):
+        """
+        Build full result dicts from compact results.
+
+        Args:
+            compact: CompactResults or its ``to_dict`` form
+
+        Returns:
+            List of result dicts, one per rule, in compiled order
+        """
+        if isinstance(compact, dict):
+            compact = CompactResults.from_dict(compact)
+        if compact.fingerprint != self.fingerprint:
+            raise ValueError(
+                f'Compact results were produced by a different rule set '
+                f'(results {compact.fingerprint}, rule set {self.fingerprint})'
+            )
+
+        results = []
+        for rule, record in zip(self.rules, compact.records):
+            current_config = compact.outputs[record.output] if record.output is not None else ''
+            results.append(rule.result(
+                record.status == STATUS_COMPLIANT,
+                STATUS_NAMES[record.status],
+                rule.describe(record.detail, record.arg),
+                current_config
+            ))
+        return results
+
+    def evaluate(self, running_config=None, outputs=None, errors=None):
+        """
+        Evaluate every rule for one device.
+
+        Same arguments as ``evaluate_compact``.
+
+        Returns:
+            List of result dicts, one per rule, in compiled order
+        """
+        return self.expand(self.evaluate_compact(running_config, outputs, errors))
+
+    @staticmethod
+    def summarize(results):
+        """Summary counts matching device_compliance_summary"""
+        total = len(results)
+        compliant = sum(1 for r in results if r['compliant'])
+        errors = sum(1 for r in results if r['status'] == 'Error')
+        return {
+            'total_checks': total,
+            'compliant': compliant,
+            'non_compliant': total - compliant,
+            'errors': errors,
+            'compliance_percentage': round(compliant / total * 100, 2) if total else 0
+        }
+
+    def to_dict(self):
+        """Serialize the rule set to plain data"""
+        return {
+            'format_version': RULE_SET_FORMAT_VERSION,
+            'categories': self.categories,
+            'checks': [rule.check for rule in self.rules]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Load a rule set produced by ``to_dict``"""
+        version = data.get('format_version')
+        if version != RULE_SET_FORMAT_VERSION:
+            raise ValueError(f"Unsupported rule set format version: {version}")
+        # Checks are stored already filtered and ordered
+        evaluator = cls(data.get('checks', []))
+        evaluator.categories = data.get('categories')
+        return evaluator
+
+    def save(self, path):
+        """Write the rule set to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Load a rule set from a JSON file written by ``save``"""
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(state.get('checks', []))
+        self.categories = state.get('categories')
+
+    def __len__(self):
+        return len(self.rules)
+
+
+@lru_cache(maxsize=4)
+def _load_rule_set(path, mtime_ns, size):
+    """Load a compiled rule set once per file version"""
+    return RuleSetEvaluator.load(path)
+
+
+def load_rule_set(path):
+    """
+    Shared evaluator for a rule set file, reloaded when the file changes.
+
+    The evaluator is cached per process, so callers must not modify it.
+    """
+    stat = os.stat(path)
+    return _load_rule_set(path, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Offline remediation planning.
+
+Turns the fix commands of every failing rule on a device into one
+ordered, de-duplicated change set, computed from saved configs and
+results without touching the device:
+
+- Fix commands are parsed into (parents, line) entries using the config
+  hierarchy, so ``line vty 0 15`` / ``transport input ssh`` from one rule
+  and ``line vty 0 15`` / ``exec-timeout 10 0`` from another end up under
+  a single parent, and identical lines from different rules collapse.
+- Entries already present in the device's saved running config are
+  dropped.
+- The rest are ordered by dependency phase (``aaa new-model`` before any
+  other ``aaa`` command, credentials and keys before what references
+  them, global config before interfaces and lines), keeping rule order
+  (CAT I first) within a phase.
+
+A fleet plan stores each distinct block once and lists block indexes per
+device, so the plan file stays small when most devices need the same
+fixes. Plans are pushed one block at a time (``parents`` plus ``lines``);
+``render_commands`` turns a device's blocks into indented config text for
+review.
+"""
+
+import json
+import re
+
+PLAN_FORMAT_VERSION = 1
+
+# Longest keyword prefix looked up when classifying a command
+MAX_KEYWORD_WORDS = 3
+
+# CLI navigation that never belongs in a change set
+NAVIGATION_COMMANDS = frozenset([
+    'configure terminal', 'conf t', 'write memory', 'write', 'wr',
+    'copy running-config startup-config'
+])
+
+# Context opener -> sub-commands accepted under it when fix text arrives
+# without indentation (fix commands extracted from checklist fix text)
+CONTEXT_CHILDREN = {
+    'interface': frozenset([
+        'description', 'shutdown', 'switchport', 'spanning-tree', 'storm-control',
+        'speed', 'duplex', 'mtu', 'channel-group', 'ipv6', 'cdp enable', 'lldp',
+        'authentication', 'dot1x', 'mab', 'service-policy', 'ip address',
+        'ip access-group', 'ip helper-address', 'ip proxy-arp', 'ip directed-broadcast',
+        'ip unreachables', 'ip redirects', 'ip mask-reply', 'ip verify',
+        'ip dhcp snooping', 'ip arp inspection', 'ip ospf'
+    ]),
+    'line': frozenset([
+        'exec-timeout', 'transport', 'login', 'access-class', 'session-timeout',
+        'absolute-timeout', 'password', 'privilege', 'exec', 'logging synchronous',
+        'authorization', 'accounting'
+    ]),
+    'router': frozenset([
+        'network', 'neighbor', 'passive-interface', 'router-id', 'area',
+        'redistribute', 'default-information', 'authentication'
+    ]),
+    'ip access-list': frozenset(['permit', 'deny', 'remark']),
+    'ipv6 access-list': frozenset(['permit', 'deny', 'remark', 'sequence']),
+    'key chain': frozenset(['key', 'key-string', 'accept-lifetime', 'send-lifetime']),
+    'aaa group server': frozenset(['server', 'server-private', 'ip vrf', 'ip tacacs', 'ip radius']),
+    'tacacs server': frozenset(['address', 'key', 'port', 'timeout', 'single-connection']),
+    'radius server': frozenset(['address', 'key', 'timeout', 'retransmit']),
+    'class-map': frozenset(['match', 'description']),
+    'policy-map': frozenset(['class', 'description']),
+    'control-plane': frozenset(['service-policy']),
+    'archive': frozenset(['log config', 'logging enable', 'notify', 'hidekeys', 'path', 'maximum', 'time-period'])
+}
+
+# Global commands that share a leading keyword with a sub-command above
+GLOBAL_ONLY_COMMANDS = frozenset([
+    'login block-for', 'login on-failure', 'login on-success', 'login delay', 'login quiet-mode'
+])
+
+# Dependency phases in push order. A command's phase comes from its longest
+# matching keyword prefix (ignoring a leading "no"); anything unmatched is
+# plain global config.
+REMEDIATION_PHASES = (
+    ('identity', ('hostname', 'ip domain-name', 'ip domain name')),
+    ('aaa-model', ('aaa new-model',)),
+    ('credentials', ('username', 'enable secret', 'enable password', 'enable algorithm-type',
+                     'key chain', 'tacacs server', 'tacacs-server', 'radius server',
+                     'radius-server', 'aaa group server')),
+    ('aaa', ('aaa',)),
+    ('ssh', ('crypto key', 'crypto pki', 'ip ssh', 'ip scp')),
+    ('objects', ('access-list', 'ip access-list', 'ipv6 access-list', 'object-group',
+                 'class-map', 'policy-map', 'snmp-server view', 'ntp authentication-key')),
+    ('references', ('snmp-server group', 'ntp trusted-key')),
+    ('global', ()),
+    ('interfaces', ('interface',)),
+    ('lines', ('line',)),
+    ('banners', ('banner',))
+)
+
+PHASE_NAMES = tuple(name for name, _prefixes in REMEDIATION_PHASES)
+
+_PHASE_RANKS = {
+    prefix: rank
+    for rank, (_name, prefixes) in enumerate(REMEDIATION_PHASES)
+    for prefix in prefixes
+}
+
+_DEFAULT_RANK = PHASE_NAMES.index('global')
+
+# "banner <type> <delimiter>..." - the delimiter is the first character
+_BANNER_RE = re.compile(r'^banner\s+\S+\s+(\S)')
+
+SEVERITY_ORDER = {'CAT_I': 0, 'CAT_II': 1, 'CAT_III': 2}
+
+
+def _keyword(command, table):
+    """Longest leading keyword phrase of command found in table, or None"""
+    words = command.split()
+    if words[:1] == ['no']:
+        words = words[1:]
+    for count in range(min(len(words), MAX_KEYWORD_WORDS), 0, -1):
+        phrase = ' '.join(words[:count])
+        if phrase in table:
+            return phrase
+    return None
+
+
+def command_phase(command):
+    """Rank of the dependency phase a top-level command belongs to"""
+    phrase = _keyword(command, _PHASE_RANKS)
+    return _DEFAULT_RANK if phrase is None else _PHASE_RANKS[phrase]
+
+
+def _context(command):
+    """Context keyword if command opens a config sub-mode"""
+    if command.startswith('no '):
+        return None
+    return _keyword(command, CONTEXT_CHILDREN)
+
+
+def _is_child(context, command):
+    if _keyword(command, GLOBAL_ONLY_COMMANDS) is not None:
+        return False
+    if _keyword(command, CONTEXT_CHILDREN[context]) is not None:
+        return True
+    # Numbered access-list entries ("10 permit ...")
+    return context.endswith('access-list') and command.split()[0].isdigit()
+
+
+def iter_hierarchy(lines, infer_children=False):
+    """
+    Walk config or fix command lines as (parents, lines) entries.
+
+    Indentation decides the hierarchy. With ``infer_children``, unindented
+    lines following a context opener (``line vty 0 15``) are taken as its
+    sub-commands when they are known sub-commands of that context. ``exit``
+    leaves one level and ``end`` returns to global config. A banner is
+    yielded as one entry holding all of its lines.
+
+    Args:
+        lines: Iterable of config lines
+        infer_children: Apply the unindented sub-command heuristic
+
+    Yields:
+        Tuple of (parents tuple, lines tuple)
+    """
+    stack = []  # [(indent, command, context)]
+    banner = None  # (delimiter, [lines])
+
+    for raw in lines:
+        if banner is not None:
+            banner[1].append(raw.rstrip())
+            if banner[0] in raw:
+                yield (), tuple(banner[1])
+                banner = None
+            continue
+
+        command = ' '.join(raw.split())
+        if not command or command.startswith('!'):
+            continue
+        lowered = command.lower()
+        if lowered == 'end':
+            stack = []
+            continue
+        if lowered == 'exit':
+            # Leave the current sub-mode: drop its sub-commands, then the parent
+            if stack and stack[-1][0] > 0:
+                level = stack[-1][0]
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+            if stack:
+                stack.pop()
+            continue
+        if lowered in NAVIGATION_COMMANDS:
+            continue
+
+        indent = len(raw) - len(raw.lstrip())
+        if indent == 0:
+            match = _BANNER_RE.match(command)
+            if match:
+                stack = []
+                if match.group(1) in command[match.end():]:
+                    yield (), (raw.rstrip(),)
+                else:
+                    banner = (match.group(1), [raw.rstrip()])
+                continue
+            if infer_children and stack and stack[0][2] and _is_child(stack[0][2], command):
+                indent = 1
+
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        yield tuple(entry[1] for entry in stack), (command,)
+        stack.append((indent, command, _context(command) if indent == 0 else None))
+
+    if banner is not None:
+        yield (), tuple(banner[1])
+
+
+def parse_fix_commands(commands):
+    """
+    Split one rule's fix commands into hierarchy entries.
+
+    Context openers that only exist to hold sub-commands are not entries
+    of their own; they appear as the parents of their sub-commands.
+
+    Returns:
+        List of (parents, lines) tuples in fix command order
+    """
+    entries = list(iter_hierarchy(commands, infer_children=True))
+    used_parents = set()
+    for parents, _lines in entries:
+        for depth in range(1, len(parents) + 1):
+            used_parents.add(parents[:depth])
+    return [
+        (parents, lines) for parents, lines in entries
+        if len(lines) > 1 or parents + lines not in used_parents
+    ]
+
+
+def config_entries(lines):
+    """Set of (parents, lines) entries present in a running config"""
+    return frozenset(iter_hierarchy(lines))
+
+
+def render_commands(blocks):
+    """
+    Indented config lines for a sequence of plan blocks.
+
+    Parents are emitted once per run of blocks that share them, giving the
+    text a reviewer would see in a config file. This is for display and
+    for ``src``-style config text only: ios_config ``lines`` without
+    ``parents`` would collapse identical sub-commands of different parents,
+    so plans are pushed as merge_push_blocks groups with their parents.
+    """
+    commands = []
+    current = ()
+    for block in blocks:
+        parents = tuple(block['parents'])
+        if parents != current:
+            common = 0
+            while common < min(len(parents), len(current)) and parents[common] == current[common]:
+                common += 1
+            for depth in range(common, len(parents)):
+                commands.append(' ' * depth + parents[depth])
+            current = parents
+        indent = ' ' * len(parents)
+        commands.extend(indent + line for line in block['lines'])
+    return commands
+
+
+
+def merge_push_blocks(blocks):
+    """
+    Merge consecutive blocks with the same parents into one push.
+
+    Each merged block is one ios_config call, so a plan of many global
+    commands becomes a single call. Only neighbours are merged, which keeps
+    plan order; a line repeated under the same parents is sent once.
+
+    Returns:
+        List of {'parents', 'lines', 'stig_ids'} dicts in push order
+    """
+    merged = []
+    for block in blocks:
+        parents = list(block['parents'])
+        if merged and merged[-1]['parents'] == parents:
+            target = merged[-1]
+        else:
+            target = {'parents': parents, 'lines': [], 'stig_ids': []}
+            merged.append(target)
+        for key, values in (('lines', block['lines']), ('stig_ids', block.get('stig_ids', []))):
+            for value in values:
+                if value not in target[key]:
+                    target[key].append(value)
+    return merged
+
+
+class RemediationPlan:
+    """Dependency-ordered remediation change sets for a fleet"""
+
+    def __init__(self, rule_set=None, generated=None):
+        self.rule_set = rule_set
+        self.generated = generated
+        self.blocks = []
+        self.block_index = {}
+        self.devices = {}
+
+    def _block_position(self, parents, lines, stig_ids):
+        key = (parents, tuple(lines), tuple(stig_ids))
+        position = self.block_index.get(key)
+        if position is None:
+            position = len(self.blocks)
+            self.blocks.append({'parents': list(parents), 'lines': list(lines), 'stig_ids': list(stig_ids)})
+            self.block_index[key] = position
+        return position
+
+    def add_device(self, hostname, findings, config_lines=None, config_file=None, unverified=None):
+        """
+        Plan one device.
+
+        Args:
+            hostname: Device hostname
+            findings: Failing rules as (stig_id, severity, fix_commands),
+                planned CAT I first and in the given order within a severity
+            config_lines: Lines of the saved running config; entries
+                already present are left out of the plan
+            config_file: Saved config the plan was computed against
+            unverified: STIG IDs among the findings whose check could not
+                be evaluated (status Error). They are planned like any other
+                failure, as the remediation role does, and listed separately
+                for review.
+        """
+        present = config_entries(config_lines) if config_lines is not None else frozenset()
+        findings = sorted(findings, key=lambda finding: SEVERITY_ORDER.get(finding[1], 3))
+
+        entries = {}  # (parents, lines) -> [stig_ids]
+        seen = set()
+        stig_ids = []
+        no_fix = []
+        duplicates = 0
+        already_present = 0
+
+        for stig_id, _severity, fix_commands in findings:
+            if not fix_commands:
+                no_fix.append(stig_id)
+                continue
+            stig_ids.append(stig_id)
+            for key in parse_fix_commands(fix_commands):
+                if key in seen:
+                    duplicates += 1
+                    if key in entries and stig_id not in entries[key]:
+                        entries[key].append(stig_id)
+                    continue
+                seen.add(key)
+                if key in present:
+                    already_present += 1
+                    continue
+                entries[key] = [stig_id]
+
+        ordered = sorted(
+            entries.items(),
+            key=lambda item: command_phase(item[0][0][0] if item[0][0] else item[0][1][0])
+        )
+
+        # Sub-commands of the same parents form one block; every global
+        # command and every banner is a block of its own
+        grouped = []
+        for (parents, lines), entry_stig_ids in ordered:
+            if grouped and parents and grouped[-1][0] == parents and len(lines) == 1:
+                grouped[-1][1].append(lines[0])
+                grouped[-1][2].extend(s for s in entry_stig_ids if s not in grouped[-1][2])
+            else:
+                grouped.append((parents, list(lines), list(entry_stig_ids)))
+
+        self.devices[hostname] = {
+            'config_file': config_file,
+            'stig_ids': stig_ids,
+            'no_fix_commands': no_fix,
+            'unverified': [stig_id for stig_id in stig_ids if stig_id in (unverified or ())],
+            'blocks': [self._block_position(*block) for block in grouped],
+            'commands': sum(len(lines) for _parents, lines, _ids in grouped),
+            'duplicates_collapsed': duplicates,
+            'already_present': already_present
+        }
+
+    def device_blocks(self, hostname):
+        return [self.blocks[position] for position in self.devices[hostname]['blocks']]
+
+    def device_commands(self, hostname):
+        return render_commands(self.device_blocks(hostname))
+
+    def summary(self):
+        devices = self.devices.values()
+        return {
+            'devices': len(self.devices),
+            'devices_with_changes': sum(1 for device in devices if device['blocks']),
+            'unique_blocks': len(self.blocks),
+            'commands': sum(device['commands'] for device in devices),
+            'duplicates_collapsed': sum(device['duplicates_collapsed'] for device in devices),
+            'unverified': sum(len(device.get('unverified', [])) for device in devices),
+            'already_present': sum(device['already_present'] for device in devices),
+            'rules_without_fix_commands': sorted({
+                stig_id for device in devices for stig_id in device['no_fix_commands']
+            })
+        }
+
+    # Serialization --------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            'format_version': PLAN_FORMAT_VERSION,
+            'generated': self.generated,
+            'rule_set': self.rule_set,
+            'phases': list(PHASE_NAMES),
+            'blocks': self.blocks,
+            'devices': self.devices,
+            'summary': self.summary()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('format_version') != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported remediation plan format: {data.get('format_version')}")
+        plan = cls(data.get('rule_set'), data.get('generated'))
+        for block in data['blocks']:
+            plan._block_position(tuple(block['parents']), block['lines'], block['stig_ids'])
+        plan.devices = {hostname: dict(device) for hostname, device in data['devices'].items()}
+        return plan
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self):
+        return len(self.devices)
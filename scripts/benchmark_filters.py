@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the STIG filter plugin hot paths.
+
+Times each filter of a baseline version of the plugin against the
+current one on the same input, and checks that both return the same
+result. The baseline is a git revision of filter_plugins/stig_filters.py
+(the repository's first commit by default) or a path to a copy of it.
+Both versions run with Python's own re cache as in production; nothing is
+purged between calls.
+
+Usage:
+  ./scripts/benchmark_filters.py
+  ./scripts/benchmark_filters.py --lines 5000 --iterations 200
+  ./scripts/benchmark_filters.py --baseline v1.0.0
+  ./scripts/benchmark_filters.py --baseline /tmp/stig_filters_old.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+import types
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'filter_plugins'))
+
+import stig_filters  # noqa: E402
+
+
+EXPECTED = [
+    'service password-encryption',
+    'no ip http server',
+    'logging buffered 64000 informational',
+    'ip ssh version 2',
+    'login block-for 900 attempts 3 within 120',
+    'ntp authenticate',
+    'aaa new-model',
+    'exec-timeout 10 0'
+]
+
+PROHIBITED = [
+    'no service pad',
+    'ip http server',
+    'no ip source-route',
+    'service finger',
+    'no cdp run'
+]
+
+SEVERITY_ITEMS = [
+    {'stig_id': f'CISC-ND-{i:06d}', 'severity': ('CAT_I', 'CAT_II', 'CAT_III')[i % 3]}
+    for i in range(300)
+]
+
+
+def build_config(line_count):
+    """Synthetic running-config of roughly line_count lines"""
+    lines = ['hostname bench-sw01', 'service password-encryption', 'aaa new-model']
+    index = 0
+    while len(lines) < line_count:
+        lines.extend([
+            f'interface GigabitEthernet1/0/{index}',
+            f' description access port {index}',
+            ' switchport mode access',
+            ' shutdown',
+            '!'
+        ])
+        index += 1
+    lines.extend(['ip ssh version 2', 'ntp authenticate', 'line vty 0 4', ' exec-timeout 10 0', 'end'])
+    return '\n'.join(lines)
+
+
+def load_baseline(baseline):
+    """Load the baseline filter plugin from a file path or a git revision"""
+    if os.path.isfile(baseline):
+        with open(baseline, 'r') as f:
+            source = f.read()
+    else:
+        if not baseline:
+            baseline = subprocess.check_output(
+                ['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=PROJECT_DIR, text=True
+            ).split()[0]
+        source = subprocess.check_output(
+            ['git', 'show', f'{baseline}:filter_plugins/stig_filters.py'], cwd=PROJECT_DIR, text=True
+        )
+
+    module = types.ModuleType('stig_filters_baseline')
+    module.__file__ = os.path.join(PROJECT_DIR, 'filter_plugins', 'stig_filters_baseline.py')
+    exec(compile(source, module.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def per_call(func, iterations, repeat=5):
+    """Best average seconds per call over several rounds, after one warm-up call"""
+    func()
+    return min(timeit.repeat(func, number=iterations, repeat=repeat)) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark STIG filter plugins')
+    parser.add_argument('--lines', type=int, default=200, help='Lines in the synthetic config')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--baseline', default='',
+                        help='Git revision or file of the baseline plugin (default: first commit)')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline).FilterModule().filters()
+    filters = stig_filters.FilterModule().filters()
+    config = build_config(args.lines)
+    show_version = 'Cisco IOS Software, Version 15.2(4)E10\ncisco WS-C2960X-48FPD-L\nbench-sw01 uptime is 3 weeks'
+
+    cases = [
+        ('check_config_present', (config, EXPECTED), {}),
+        ('check_config_absent', (config, PROHIBITED), {}),
+        ('extract_config_lines', (config,), {'section': 'line vty'}),
+        ('filter_by_severity', (SEVERITY_ITEMS, ['high', 'II']), {}),
+        ('parse_show_output', (show_version, 'version'), {})
+    ]
+
+    print(f"{'filter':<24}{'baseline (us)':>15}{'current (us)':>14}{'saved':>9}  same result")
+    for name, call_args, call_kwargs in cases:
+        if name not in baseline:
+            print(f"{name:<24}{'-':>15}")
+            continue
+        old_func = lambda: baseline[name](*call_args, **call_kwargs)  # noqa: E731
+        new_func = lambda: filters[name](*call_args, **call_kwargs)  # noqa: E731
+        old = per_call(old_func, args.iterations) * 1e6
+        new = per_call(new_func, args.iterations) * 1e6
+        saved = (1 - new / old) * 100 if old else 0
+        same = 'yes' if old_func() == new_func() else 'NO'
+        print(f"{name:<24}{old:>15.1f}{new:>14.1f}{saved:>8.1f}%  {same}")
+
+    info = stig_filters.cached_regex.cache_info()
+    print(f"\nregex cache: {info.currsize}/{info.maxsize} entries")
+
+
+if __name__ == '__main__':
+    main()
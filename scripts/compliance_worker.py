@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Resident STIG compliance worker.
+
+Keeps the compiled rule set and per-device state in memory, watches config
+drop directories and/or the backup store for new configs, and evaluates
+only the devices whose config changed. Results are written as device JSON
+reports, and a local HTTP endpoint reports queued and finished jobs.
+
+The rule set is the file written by the stig_parser role
+(compiled_rule_set_file); it is reloaded automatically when it changes.
+Default paths match group_vars/all.yml, which resolves them under the
+playbooks directory. Until the rule set exists the worker waits for it.
+
+Usage:
+  ./scripts/compliance_worker.py
+  ./scripts/compliance_worker.py --watch playbooks/backups --watch /srv/config-drop
+  ./scripts/compliance_worker.py --listen 127.0.0.1:8765 --interval 2
+
+Status endpoint:
+  GET /status             Worker state, rule set and queue counts
+  GET /jobs               Queued, running and recently finished jobs
+  GET /devices            Latest summary per device
+  GET /devices/<host>     Latest results for one device
+
+Watched layouts:
+  <watch>/<host>/<host>_<label>_<timestamp>.cfg   (backup store)
+  <watch>/<host>.cfg                              (flat drop directory)
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+# playbook_dir, which group_vars paths are relative to
+PLAYBOOK_DIR = os.path.join(PROJECT_DIR, 'playbooks')
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'module_utils'))
+
+from stig_evaluator import MappedConfig, RuleSetEvaluator  # noqa: E402
+
+log = logging.getLogger('compliance_worker')
+
+
+class ComplianceWorker:
+    """Watch config sources and evaluate changed devices"""
+
+    def __init__(self, rule_set_path, watch_dirs, output_dir, interval=5, history=500):
+        self.rule_set_path = rule_set_path
+        self.watch_dirs = watch_dirs
+        self.output_dir = output_dir
+        self.interval = interval
+
+        self.evaluator = None
+        self.device_only_rules = []
+        self.rule_set_mtime = None
+
+        # file path -> (mtime, size) of the last scan
+        self.seen_files = {}
+        # hostname -> {'config_hash', 'config_file', 'summary', 'results', 'evaluated'}
+        self.devices = {}
+
+        self.jobs = queue.Queue()
+        self.pending = {}
+        self.running = None
+        self.finished = deque(maxlen=history)
+        self.job_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.started = datetime.now().isoformat()
+
+    # Rule set -------------------------------------------------------------
+
+    def load_rule_set(self):
+        """(Re)load the compiled rule set if the file changed"""
+        try:
+            mtime = os.path.getmtime(self.rule_set_path)
+        except FileNotFoundError:
+            if self.evaluator is None and self.rule_set_mtime is None:
+                log.warning("Rule set %s not found; waiting for a compliance run to write it",
+                            self.rule_set_path)
+                self.rule_set_mtime = False
+            return False
+        if mtime == self.rule_set_mtime:
+            return False
+
+        # Rules that need a live show command cannot be evaluated from files
+        evaluator, device_only = RuleSetEvaluator.load(self.rule_set_path).offline_subset()
+        self.evaluator = evaluator
+        self.device_only_rules = device_only
+        self.rule_set_mtime = mtime
+        log.info("Loaded rule set %s (%d rules, %d need a live device check)",
+                 self.rule_set_path, len(evaluator), len(device_only))
+        return True
+
+    # Watching -------------------------------------------------------------
+
+    def iter_config_files(self):
+        """Yield (hostname, path) for the newest running config of each device"""
+        for watch_dir in self.watch_dirs:
+            if not os.path.isdir(watch_dir):
+                continue
+            for entry in os.scandir(watch_dir):
+                if entry.is_dir():
+                    newest = None
+                    for sub in os.scandir(entry.path):
+                        if sub.name.endswith('.cfg') and '_startup_' not in sub.name:
+                            if newest is None or sub.stat().st_mtime > newest.stat().st_mtime:
+                                newest = sub
+                    if newest is not None:
+                        yield entry.name, newest
+                elif entry.name.endswith('.cfg') and '_startup_' not in entry.name:
+                    yield entry.name[:-4], entry
+
+    def scan(self):
+        """Queue devices whose newest config file is new or modified"""
+        queued = 0
+        for hostname, entry in self.iter_config_files():
+            stat = entry.stat()
+            signature = (stat.st_mtime, stat.st_size)
+            if self.seen_files.get(entry.path) == signature:
+                continue
+            self.seen_files[entry.path] = signature
+            if self.enqueue(hostname, entry.path, 'config_changed'):
+                queued += 1
+        return queued
+
+    def enqueue(self, hostname, config_file, reason):
+        """Queue an evaluation unless one is already pending for the host"""
+        with self.lock:
+            if hostname in self.pending:
+                self.pending[hostname]['config_file'] = config_file
+                return False
+            job = {
+                'id': next(self.job_ids),
+                'hostname': hostname,
+                'config_file': config_file,
+                'reason': reason,
+                'state': 'queued',
+                'queued': datetime.now().isoformat()
+            }
+            self.pending[hostname] = job
+        self.jobs.put(job)
+        return True
+
+    def requeue_all(self):
+        """Re-evaluate every known device (after a rule set change)"""
+        with self.lock:
+            devices = list(self.devices.items())
+        for hostname, device in devices:
+            self.enqueue(hostname, device['config_file'], 'rule_set_changed')
+
+    # Evaluation -----------------------------------------------------------
+
+    def run_job(self, job):
+        """Evaluate one device config"""
+        with self.lock:
+            self.pending.pop(job['hostname'], None)
+            self.running = job
+            job.update(state='running', started=datetime.now().isoformat())
+        start = time.monotonic()
+        outcome = {}
+
+        try:
+            # Hash and evaluate straight from the mapped file; unchanged
+            # configs are never decoded
+            with MappedConfig(job['config_file']) as running_config:
+                config_hash = running_config.sha1()
+
+                with self.lock:
+                    device = self.devices.get(job['hostname'])
+                if (device and device['config_hash'] == config_hash
+                        and job['reason'] != 'rule_set_changed'):
+                    results = None
+                else:
+                    results = self.evaluator.evaluate(running_config)
+
+            if results is None:
+                outcome['state'] = 'unchanged'
+            else:
+                summary = self.evaluator.summarize(results)
+                device = {
+                    'config_hash': config_hash,
+                    'config_file': job['config_file'],
+                    'summary': summary,
+                    'results': results,
+                    'evaluated': datetime.now().isoformat()
+                }
+                with self.lock:
+                    self.devices[job['hostname']] = device
+                self.write_report(job['hostname'], device)
+                outcome.update(state='done', summary=summary)
+        except Exception as e:
+            outcome.update(state='failed', error=str(e))
+            log.exception("Evaluation failed for %s", job['hostname'])
+
+        outcome.update(duration=round(time.monotonic() - start, 3), finished=datetime.now().isoformat())
+        with self.lock:
+            # Jobs are shared with the HTTP thread; only change them under the lock
+            job.update(outcome)
+            self.running = None
+            self.finished.appendleft(job)
+        log.info("%s: %s (%.3fs)", job['hostname'], job['state'], job['duration'])
+
+    def write_report(self, hostname, device):
+        """Write the device results in the device JSON report shape"""
+        report = {
+            'report_info': {
+                'generated': device['evaluated'],
+                'report_type': 'device_compliance',
+                'stig_source': self.rule_set_path,
+                'config_file': device['config_file']
+            },
+            'device_info': {'hostname': hostname},
+            'summary': dict(device['summary'], hostname=hostname),
+            'results': device['results']
+        }
+        path = os.path.join(self.output_dir, f"{hostname}_compliance.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+
+    # Loops ----------------------------------------------------------------
+
+    def evaluation_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                job = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.run_job(job)
+
+    def watch_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                if self.load_rule_set():
+                    self.requeue_all()
+                # Configs are picked up by the first scan after the rule set loads
+                if self.evaluator is not None:
+                    self.scan()
+            except Exception:
+                log.exception("Scan failed")
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.load_rule_set()
+        for target in (self.watch_loop, self.evaluation_loop):
+            threading.Thread(target=target, daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    # Status ---------------------------------------------------------------
+
+    def status(self):
+        with self.lock:
+            return {
+                'started': self.started,
+                'rule_set': self.rule_set_path,
+                'rules': len(self.evaluator) if self.evaluator else 0,
+                'device_only_rules': self.device_only_rules,
+                'watching': self.watch_dirs,
+                'devices': len(self.devices),
+                'queued': len(self.pending),
+                'running': self.running['hostname'] if self.running else None,
+                'finished': len(self.finished)
+            }
+
+    def job_list(self):
+        """Copies of the queued, running and finished jobs"""
+        with self.lock:
+            return {
+                'queued': [dict(job) for job in self.pending.values()],
+                'running': dict(self.running) if self.running else None,
+                'finished': [dict(job) for job in self.finished]
+            }
+
+    def device_summaries(self):
+        with self.lock:
+            return {
+                hostname: dict(device['summary'], evaluated=device['evaluated'])
+                for hostname, device in self.devices.items()
+            }
+
+    def device_results(self, hostname):
+        """Latest results of one device, or None if it was never evaluated"""
+        with self.lock:
+            device = self.devices.get(hostname)
+            if device is None:
+                return None
+            return {k: v for k, v in device.items() if k != 'config_hash'}
+
+
+def make_handler(worker):
+    """Build a request handler bound to a worker instance"""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.rstrip('/')
+            if path in ('', '/status'):
+                body = worker.status()
+            elif path == '/jobs':
+                body = worker.job_list()
+            elif path == '/devices':
+                body = worker.device_summaries()
+            elif path.startswith('/devices/'):
+                body = worker.device_results(path[len('/devices/'):])
+                if body is None:
+                    self.send_error(404, 'Unknown device')
+                    return
+            else:
+                self.send_error(404)
+                return
+
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            log.debug(format, *args)
+
+    return StatusHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident STIG compliance worker')
+    parser.add_argument('--rule-set', default=os.path.join(PLAYBOOK_DIR, 'stig_checklists', 'compiled', 'compliance_rule_set.json'),
+                        help='Compiled rule set written by the stig_parser role')
+    parser.add_argument('--watch', action='append',
+                        help='Config drop directory or backup store (repeatable, default: playbooks/backups)')
+    parser.add_argument('--output-dir', default=os.path.join(PLAYBOOK_DIR, 'reports', 'worker'),
+                        help='Directory for device JSON results')
+    parser.add_argument('--interval', type=float, default=5, help='Seconds between scans')
+    parser.add_argument('--listen', default='127.0.0.1:8765', help='Status endpoint address (host:port)')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s %(levelname)s %(message)s'
+    )
+
+    watch_dirs = args.watch or [os.path.join(PLAYBOOK_DIR, 'backups')]
+    worker = ComplianceWorker(args.rule_set, watch_dirs, args.output_dir, args.interval)
+    worker.start()
+
+    host, _, port = args.listen.rpartition(':')
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), make_handler(worker))
+
+    def shutdown(signum, frame):
+        log.info("Shutting down")
+        worker.stop()
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    log.info("Watching %s, status on http://%s", ', '.join(watch_dirs), args.listen)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
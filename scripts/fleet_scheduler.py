@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Load-smoothing fleet scheduler.
+
+Spreads a scheduled compliance run over a time window instead of hitting
+every device at the same cron time. Each host gets a stable hash slot so it
+is checked at roughly the same time every day; slots are then balanced by
+each host's historical scan duration so every slot carries a similar load.
+
+A run compiles the rule set once, launches each slot as a scan-only play at
+its offset and, after every slot has finished, writes reports, the manifest
+and retention cleanup in a single report pass. Slots are polled while the
+window runs: the measured scan durations of finished slots correct the
+remaining load estimate, and the batch size (serial) of each new slot is
+fitted to that estimate, the concurrency still in use and the time left.
+
+Scan durations are the time each host spent in its own compliance_check
+tasks, recorded by the scan_durations callback in
+playbooks/logs/scan_durations/ and smoothed into scan_duration_history.json
+next to it.
+
+Usage:
+  # Show the plan for a 4 hour window in 15 minute slots
+  ./scripts/fleet_scheduler.py plan --window 240 --slot 15
+
+  # Run the daily check spread over 4 hours (e.g. from cron at 02:00)
+  ./scripts/fleet_scheduler.py run --schedule daily --window 240
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+# playbook_dir, which group_vars paths are relative to
+PLAYBOOK_DIR = os.path.join(PROJECT_DIR, 'playbooks')
+
+# Default of the scan_durations callback ({{ log_dir }}/scan_durations)
+DURATION_DIR = os.path.join(PLAYBOOK_DIR, 'logs', 'scan_durations')
+PLAYBOOK = os.path.join(PLAYBOOK_DIR, 'scheduled_check.yml')
+
+DEFAULT_DURATION = 60.0
+
+# Seconds between checks for finished slots
+POLL_INTERVAL = 5
+
+# Weight of the newest measurement in the moving average
+SMOOTHING = 0.3
+
+
+def inventory_hosts(group, inventory=None):
+    """List hosts in an inventory group using ansible-inventory"""
+    cmd = ['ansible-inventory', '--list']
+    if inventory:
+        cmd += ['-i', inventory]
+    data = json.loads(subprocess.check_output(cmd, cwd=PROJECT_DIR))
+
+    hosts = []
+    seen_groups = set()
+    pending = [group]
+    while pending:
+        name = pending.pop()
+        if name in seen_groups:
+            continue
+        seen_groups.add(name)
+        entry = data.get(name, {})
+        hosts.extend(entry.get('hosts', []))
+        pending.extend(entry.get('children', []))
+
+    return sorted(set(hosts))
+
+
+def history_file(duration_dir):
+    """Smoothed history file kept next to the duration directory"""
+    return os.path.join(os.path.dirname(os.path.abspath(duration_dir)), 'scan_duration_history.json')
+
+
+def read_samples(duration_dir):
+    """Latest recorded scan duration sample per host"""
+    samples = {}
+    if os.path.isdir(duration_dir):
+        for entry in os.scandir(duration_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            with open(entry.path, 'r') as f:
+                sample = json.load(f)
+            samples[sample.get('hostname', entry.name[:-5])] = sample
+    return samples
+
+
+def load_durations(duration_dir):
+    """
+    Merge the latest per-host measurements into the smoothed history.
+
+    Returns:
+        Dict of hostname -> smoothed scan duration in seconds
+    """
+    path = history_file(duration_dir)
+    history = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            history = json.load(f)
+
+    durations = history.get('durations', {})
+    applied = history.get('applied', {})
+
+    for hostname, sample in read_samples(duration_dir).items():
+        recorded = sample.get('recorded', '')
+        if applied.get(hostname) == recorded:
+            continue
+
+        duration = float(sample.get('duration', 0)) or DEFAULT_DURATION
+        previous = durations.get(hostname)
+        durations[hostname] = duration if previous is None else (
+            SMOOTHING * duration + (1 - SMOOTHING) * previous
+        )
+        applied[hostname] = recorded
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'durations': durations, 'applied': applied}, f, indent=2)
+
+    return durations
+
+
+def stable_slot(hostname, slot_count):
+    """Stable hash slot for a host"""
+    digest = hashlib.sha1(hostname.encode('utf-8')).hexdigest()
+    return int(digest[:12], 16) % slot_count
+
+
+def build_plan(hosts, durations, window_minutes, slot_minutes, max_batch, tolerance=0.15):
+    """
+    Assign hosts to time slots.
+
+    Hosts keep their hash slot unless it would push that slot more than
+    ``tolerance`` above the average load, in which case they move to the
+    least-loaded slot. Heavier hosts are placed first.
+
+    Returns:
+        Plan dict with 'slots' (offset, hosts, load, batch_size) and totals
+    """
+    slot_count = max(1, int(window_minutes // slot_minutes))
+    slot_seconds = slot_minutes * 60
+
+    known = [d for d in durations.values() if d > 0]
+    fallback = sorted(known)[len(known) // 2] if known else DEFAULT_DURATION
+    weights = {h: durations.get(h) or fallback for h in hosts}
+
+    total_load = sum(weights.values())
+    target = total_load / slot_count
+    limit = target * (1 + tolerance)
+
+    loads = [0.0] * slot_count
+    members = [[] for _ in range(slot_count)]
+
+    for hostname in sorted(hosts, key=lambda h: (-weights[h], h)):
+        slot = stable_slot(hostname, slot_count)
+        if loads[slot] + weights[hostname] > limit and loads[slot] > 0:
+            slot = min(range(slot_count), key=lambda i: (loads[i], i))
+        loads[slot] += weights[hostname]
+        members[slot].append(hostname)
+
+    slots = []
+    for index in range(slot_count):
+        if not members[index]:
+            continue
+        batch_size = min(max_batch, max(1, math.ceil(loads[index] / slot_seconds)))
+        slots.append({
+            'index': index,
+            'offset_minutes': index * slot_minutes,
+            'hosts': sorted(members[index]),
+            'load_seconds': round(loads[index], 1),
+            'batch_size': batch_size
+        })
+
+    return {
+        'window_minutes': window_minutes,
+        'slot_minutes': slot_minutes,
+        'total_hosts': len(hosts),
+        'total_load_seconds': round(total_load, 1),
+        'target_slot_load_seconds': round(target, 1),
+        'slots': slots
+    }
+
+
+def adaptive_batch_size(slot, remaining_load, remaining_seconds, max_batch, in_use=0):
+    """
+    Batch size for a slot given the work still ahead.
+
+    Uses the larger of the planned batch size and the concurrency needed to
+    finish all remaining work before the window closes, less the concurrency
+    of slots that are still running.
+    """
+    if remaining_seconds <= 0:
+        return max_batch
+    needed = math.ceil(remaining_load / remaining_seconds) - in_use
+    return min(max_batch, max(slot['batch_size'], needed))
+
+
+def playbook_command(stage, schedule_type, run_id, hosts, batch_size=None, extra_vars=None, inventory=None):
+    """ansible-playbook command for one stage of a spread run"""
+    cmd = [
+        'ansible-playbook', PLAYBOOK,
+        '--limit', ','.join(hosts),
+        '-e', f'schedule_type={schedule_type}',
+        '-e', f'fleet_stage={stage}',
+        '-e', f'fleet_run_id={run_id}'
+    ]
+    if batch_size is not None:
+        cmd += ['-e', f'batch_size={batch_size}']
+    if inventory:
+        cmd += ['-i', inventory]
+    for extra in extra_vars or []:
+        cmd += ['-e', extra]
+    return cmd
+
+
+def log(message):
+    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} - {message}", flush=True)
+
+
+class SlotRunner:
+    """
+    Launch slots at their offsets and correct the load estimate with the
+    scan durations measured for the hosts of finished slots.
+    """
+
+    def __init__(self, plan, duration_dir, max_batch):
+        self.duration_dir = duration_dir
+        self.max_batch = max_batch
+        self.window_seconds = plan['window_minutes'] * 60
+
+        # Samples recorded before the run are not measurements of this run
+        self.baseline = {h: s.get('recorded') for h, s in read_samples(duration_dir).items()}
+        self.measured_load = 0.0
+        self.planned_load = 0.0
+
+        self.pending = list(plan['slots'])
+        # (slot, process, batch_size, started)
+        self.running = []
+        self.exit_code = 0
+
+    @property
+    def load_factor(self):
+        """Measured / planned load of the hosts that reported so far"""
+        return self.measured_load / self.planned_load if self.planned_load else 1.0
+
+    def collect_finished(self):
+        """Record exit codes and measured durations of finished slots"""
+        still_running = []
+        samples = None
+        for slot, process, batch_size, started in self.running:
+            if process.poll() is None:
+                still_running.append((slot, process, batch_size, started))
+                continue
+
+            self.exit_code = self.exit_code or process.returncode
+            if samples is None:
+                samples = read_samples(self.duration_dir)
+            measured = [
+                float(samples[h].get('duration', 0))
+                for h in slot['hosts']
+                if h in samples and samples[h].get('recorded') != self.baseline.get(h)
+            ]
+            if measured:
+                self.measured_load += sum(measured)
+                self.planned_load += slot['load_seconds'] * len(measured) / len(slot['hosts'])
+            log(f"Slot {slot['index']} finished (exit {process.returncode}), "
+                f"{len(measured)}/{len(slot['hosts'])} hosts measured, load factor {self.load_factor:.2f}")
+        self.running = still_running
+
+    def remaining_load(self, elapsed):
+        """Host-seconds of work left (pending and running slots), corrected by the load factor"""
+        factor = self.load_factor
+        load = factor * sum(slot['load_seconds'] for slot in self.pending)
+        for slot, _process, batch_size, started in self.running:
+            done = (elapsed - started) * batch_size
+            load += max(0.0, factor * slot['load_seconds'] - done)
+        return load
+
+    def launch_next(self, elapsed, command):
+        """Start the next pending slot with a batch size fitted to the remaining window"""
+        remaining_load = self.remaining_load(elapsed)
+        in_use = sum(batch_size for _slot, _process, batch_size, _started in self.running)
+        slot = self.pending.pop(0)
+        batch_size = adaptive_batch_size(
+            slot, remaining_load, self.window_seconds - elapsed, self.max_batch, in_use
+        )
+        log(f"Slot {slot['index']}: {len(slot['hosts'])} hosts, batch size {batch_size}")
+        process = subprocess.Popen(
+            command(slot['hosts'], batch_size), cwd=PROJECT_DIR,
+            env=dict(os.environ, SCAN_DURATION_DIR=os.path.abspath(self.duration_dir))
+        )
+        self.running.append((slot, process, batch_size, elapsed))
+
+    def run(self, command):
+        """
+        Run every slot, polling for finished ones until all are done.
+
+        Args:
+            command: Callable (hosts, batch_size) -> command line of a slot
+
+        Returns:
+            First non-zero slot exit code, or 0
+        """
+        start = time.monotonic()
+        while self.pending or self.running:
+            self.collect_finished()
+            elapsed = time.monotonic() - start
+
+            if self.pending and self.pending[0]['offset_minutes'] * 60 <= elapsed:
+                self.launch_next(elapsed, command)
+                continue
+
+            wait = POLL_INTERVAL
+            if self.pending:
+                wait = min(wait, self.pending[0]['offset_minutes'] * 60 - elapsed)
+            if self.pending or self.running:
+                time.sleep(max(0.0, wait))
+        return self.exit_code
+
+
+def run_plan(plan, schedule_type, max_batch, duration_dir, extra_vars=None, inventory=None):
+    """
+    Compile the rule set once, run every slot scan-only at its offset, then
+    write reports for all slots in one pass.
+    """
+    run_id = f"{schedule_type}-{datetime.now():%Y%m%dT%H%M%S}"
+    hosts = [host for slot in plan['slots'] for host in slot['hosts']]
+
+    log(f"Run {run_id}: compiling rule set")
+    exit_code = subprocess.call(
+        playbook_command('prepare', schedule_type, run_id, hosts, extra_vars=extra_vars, inventory=inventory),
+        cwd=PROJECT_DIR
+    )
+    if exit_code:
+        return exit_code
+
+    runner = SlotRunner(plan, duration_dir, max_batch)
+    exit_code = runner.run(lambda slot_hosts, batch_size: playbook_command(
+        'scan', schedule_type, run_id, slot_hosts, batch_size, extra_vars, inventory
+    ))
+
+    log(f"Run {run_id}: writing reports for {len(hosts)} hosts")
+    report_code = subprocess.call(
+        playbook_command('report', schedule_type, run_id, hosts, extra_vars=extra_vars, inventory=inventory),
+        cwd=PROJECT_DIR
+    )
+    return exit_code or report_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-smoothing fleet scheduler')
+    parser.add_argument('action', choices=['plan', 'run'])
+    parser.add_argument('--schedule', default='daily', choices=['daily', 'weekly', 'monthly', 'manual'])
+    parser.add_argument('--window', type=float, default=240, help='Window length in minutes')
+    parser.add_argument('--slot', type=float, default=15, help='Slot length in minutes')
+    parser.add_argument('--max-batch', type=int, default=20, help='Upper bound for serial batch size')
+    parser.add_argument('--group', default='cisco_devices', help='Inventory group to schedule')
+    parser.add_argument('-i', '--inventory', help='Inventory file (default from ansible.cfg)')
+    parser.add_argument('-e', '--extra-vars', action='append', help='Extra vars passed to every stage')
+    parser.add_argument('--duration-dir', default=DURATION_DIR,
+                        help='Per-host scan durations written by the scan_durations callback')
+    args = parser.parse_args()
+
+    hosts = inventory_hosts(args.group, args.inventory)
+    if not hosts:
+        print(f"No hosts found in group {args.group}", file=sys.stderr)
+        return 1
+
+    plan = build_plan(hosts, load_durations(args.duration_dir), args.window, args.slot, args.max_batch)
+
+    if args.action == 'plan':
+        print(json.dumps(plan, indent=2))
+        return 0
+
+    return run_plan(plan, args.schedule, args.max_batch, args.duration_dir, args.extra_vars, args.inventory)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,6 +7,7 @@
 #   ./scripts/setup_schedule.sh              # Interactive setup
 #   ./scripts/setup_schedule.sh --daily      # Setup daily only
 #   ./scripts/setup_schedule.sh --all        # Setup all schedules
+#   ./scripts/setup_schedule.sh --smoothed   # Daily check spread over a window
 #   ./scripts/setup_schedule.sh --remove     # Remove all schedules
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
@@ -16,6 +17,8 @@ PROJECT_DIR="$(dirname "$SCRIPT_DIR")"
 DAILY_SCHEDULE="0 6 * * *"           # 6:00 AM daily
 WEEKLY_SCHEDULE="0 6 * * 0"          # 6:00 AM Sundays
 MONTHLY_SCHEDULE="0 6 1 * *"         # 6:00 AM first day of month
+SMOOTHED_SCHEDULE="0 2 * * *"        # 2:00 AM daily, window start
+SMOOTHED_WINDOW="${SMOOTHED_WINDOW:-240}"  # Window length in minutes
 
 setup_daily() {
     echo "Setting up daily compliance check..."
@@ -35,6 +38,12 @@ setup_monthly() {
     echo "Monthly check scheduled for 1st of each month at 6:00 AM"
 }
 
+setup_smoothed() {
+    echo "Setting up load-smoothed daily compliance check..."
+    (crontab -l 2>/dev/null | grep -v "cisco-stig.*daily"; echo "$SMOOTHED_SCHEDULE cd $PROJECT_DIR && ./scripts/fleet_scheduler.py run --schedule daily --window $SMOOTHED_WINDOW >> logs/cron_daily.log 2>&1") | crontab -
+    echo "Daily check scheduled from 2:00 AM, spread over $SMOOTHED_WINDOW minutes"
+}
+
 remove_all() {
     echo "Removing all scheduled compliance checks..."
     crontab -l 2>/dev/null | grep -v "cisco-stig" | crontab -
@@ -57,6 +66,9 @@ case "${1:-}" in
     --monthly)
         setup_monthly
         ;;
+    --smoothed)
+        setup_smoothed
+        ;;
     --all)
         setup_daily
         setup_weekly
@@ -76,6 +88,7 @@ case "${1:-}" in
         echo "  --daily    Setup daily check (6:00 AM)"
         echo "  --weekly   Setup weekly check (Sundays 6:00 AM)"
         echo "  --monthly  Setup monthly check (1st of month 6:00 AM)"
+        echo "  --smoothed Setup daily check spread over a window (2:00 AM + ${SMOOTHED_WINDOW}m)"
         echo "  --all      Setup all schedules"
         echo "  --remove   Remove all schedules"
         echo "  --show     Show current schedules"
@@ -0,0 +1,118 @@
+"""
+Shared setup for unit tests.
+
+module_utils and filter_plugins are plain Python and are imported directly;
+library modules need Ansible and are loaded from their files by the tests
+that use them.
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name in ('module_utils', 'filter_plugins'):
+    path = os.path.join(PROJECT_DIR, name)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def load_library_module(name, directory='library'):
+    """Import a module from library/ or a plugin directory (skips the test if Ansible is missing)"""
+    pytest.importorskip('ansible')
+    path = os.path.join(PROJECT_DIR, directory, f'{name}.py')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+RUNNING_CONFIG = """\
+hostname test-sw01
+!
+service password-encryption
+no service pad
+ip http server
+aaa new-model
+aaa authentication login default group tacacs+ local
+!
+interface GigabitEthernet1/0/1
+ description uplink
+ switchport mode trunk
+!
+line con 0
+ exec-timeout 10 0
+line vty 0 4
+ exec-timeout 30 0
+ transport input ssh
+!
+ntp server 10.0.0.1
+logging buffered 64000 informational
+end
+"""
+
+
+CHECKS = [
+    {
+        'stig_id': 'CISC-ND-000010', 'category': 'aaa', 'severity': 'CAT_I', 'check_type': 'present',
+        'check_command': 'show running-config | section aaa',
+        'expected_config': ['aaa new-model', 'aaa authentication login default group tacacs+ local'],
+        'fix_commands': ['aaa new-model']
+    },
+    {
+        'stig_id': 'CISC-ND-000020', 'category': 'aaa', 'severity': 'CAT_II', 'check_type': 'present',
+        'check_command': 'show running-config | section aaa',
+        'expected_config': ['aaa accounting exec default start-stop group tacacs+'],
+        'fix_commands': ['aaa accounting exec default start-stop group tacacs+']
+    },
+    {
+        'stig_id': 'CISC-ND-000100', 'category': 'services', 'severity': 'CAT_I', 'check_type': 'absent',
+        'check_command': 'show running-config | include ip http',
+        'prohibited_config': ['ip http server', 'ip http secure-server'],
+        'fix_commands': ['no ip http server']
+    },
+    {
+        'stig_id': 'CISC-ND-000110', 'category': 'services', 'severity': 'CAT_III', 'check_type': 'absent',
+        'check_command': 'show running-config | include service pad',
+        'prohibited_config': ['no service pad'],
+        'fix_commands': ['no service pad']
+    },
+    {
+        'stig_id': 'CISC-ND-000200', 'category': 'access', 'severity': 'CAT_II', 'check_type': 'present',
+        'check_command': 'show running-config | section line vty',
+        'expected_config': ['transport input ssh'],
+        'check_regex': r'exec-timeout\s+\d+',
+        'fix_commands': ['line vty 0 4', ' transport input ssh']
+    },
+    {
+        'stig_id': 'CISC-ND-000210', 'category': 'access', 'severity': 'CAT_II', 'check_type': 'regex',
+        'check_command': 'show running-config | section line vty',
+        'check_regex': r'exec-timeout\s+(10|[1-9])\s',
+        'fix_commands': ['line vty 0 4', ' exec-timeout 10 0']
+    },
+    {
+        'stig_id': 'CISC-ND-000300', 'category': 'logging', 'severity': 'CAT_III', 'check_type': 'present',
+        'check_command': 'show running-config',
+        'expected_config': ['logging buffered 64000 informational', 'ntp server 10.0.0.1'],
+        'fix_commands': ['logging buffered 64000 informational']
+    },
+    {
+        'stig_id': 'CISC-ND-000400', 'category': 'access', 'severity': 'CAT_I', 'check_type': 'present',
+        'check_command': 'show ip ssh',
+        'expected_config': ['SSH Enabled - version 2.0'],
+        'fix_commands': ['ip ssh version 2']
+    }
+]
+
+
+@pytest.fixture
+def running_config():
+    return RUNNING_CONFIG
+
+
+@pytest.fixture
+def checks():
+    return [dict(check) for check in CHECKS]
@@ -0,0 +1,52 @@
+"""Tests for library/compliance_evaluator.py"""
+
+import json
+
+import pytest
+
+from conftest import load_library_module
+from stig_evaluator import RuleSetEvaluator
+
+
+@pytest.fixture(scope='module')
+def compliance_evaluator():
+    return load_library_module('compliance_evaluator')
+
+
+class TestExport:
+
+    def test_matches_expanded_json(self, compliance_evaluator, tmp_path, checks, running_config):
+        rule_set = str(tmp_path / 'rule_set.json')
+        evaluator = RuleSetEvaluator(checks)
+        evaluator.save(rule_set)
+        compact = evaluator.evaluate_compact(running_config)
+        results = evaluator.expand(compact.to_dict())
+        summary = RuleSetEvaluator.summarize(results)
+
+        devices = {
+            'sw2': {'records': compact.to_dict(), 'rule_set': rule_set, 'summary': summary, 'device_info': {}},
+            'sw1': {'results': results, 'summary': summary, 'device_info': {'model': 'C9300'}}
+        }
+        report_info = {'report_type': 'consolidated_compliance'}
+        stats = compliance_evaluator.overall_stats(devices)
+        path = str(tmp_path / 'consolidated.json')
+        compliance_evaluator.export_results(path, devices, report_info, stats)
+
+        expected = {
+            'report_info': report_info,
+            'overall_stats': stats,
+            'devices': {
+                'sw1': devices['sw1'],
+                'sw2': {'results': results, 'summary': summary, 'device_info': {}}
+            }
+        }
+        with open(path) as f:
+            assert f.read() == json.dumps(expected, indent=4, sort_keys=True)
+
+    def test_no_devices(self, compliance_evaluator, tmp_path):
+        path = str(tmp_path / 'consolidated.json')
+        stats = compliance_evaluator.overall_stats({})
+        compliance_evaluator.export_results(path, {}, {}, stats)
+
+        with open(path) as f:
+            assert json.load(f) == {'devices': {}, 'overall_stats': stats, 'report_info': {}}
@@ -0,0 +1,48 @@
+"""Tests for library/report_manifest.py"""
+
+import pytest
+
+from conftest import load_library_module
+
+
+@pytest.fixture(scope='module')
+def manifest():
+    return load_library_module('report_manifest')
+
+
+def make_entry(run_id, artifacts):
+    return {
+        'run_id': run_id, 'schedule': 'daily', 'timestamp': run_id, 'score': 90.0,
+        'device_count': 1, 'artifacts': artifacts, 'devices': {'sw1': 90.0}
+    }
+
+
+class TestManifest:
+
+    def test_read_tail_newest_first(self, manifest, tmp_path):
+        manifest_path = str(tmp_path / 'manifest.jsonl')
+        state_path = str(tmp_path / 'latest.json')
+        for index in range(5):
+            manifest.append_entry(manifest_path, state_path, make_entry(f'run-{index}', {}))
+
+        assert [e['run_id'] for e in manifest.read_tail(manifest_path, 3)] == ['run-4', 'run-3', 'run-2']
+        assert manifest.load_state(state_path)['total_runs'] == 5
+
+    def test_expired_artifacts_left_out(self, manifest, tmp_path):
+        (tmp_path / 'daily' / '2024-07-10').mkdir(parents=True)
+        (tmp_path / 'daily' / '2024-07-10' / 'consolidated.html').write_text('report')
+        summary = manifest.run_summary(make_entry('run-1', {
+            'consolidated_html': 'daily/2024-07-10/consolidated.html',
+            'executive_summary': 'daily/2024-06-01/executive.html'
+        }))
+
+        checked = manifest.existing_artifacts(summary, str(tmp_path))
+
+        assert checked['artifacts'] == {'consolidated_html': 'daily/2024-07-10/consolidated.html'}
+        assert checked['expired_artifacts'] == ['executive_summary']
+        assert 'expired_artifacts' not in summary
+
+    def test_all_artifacts_present(self, manifest, tmp_path):
+        (tmp_path / 'report.html').write_text('report')
+        summary = manifest.run_summary(make_entry('run-1', {'consolidated_html': 'report.html'}))
+        assert manifest.existing_artifacts(summary, str(tmp_path)) is summary
@@ -0,0 +1,91 @@
+"""Tests for library/report_retention.py"""
+
+import os
+import tarfile
+import time
+
+import pytest
+
+from conftest import load_library_module
+
+DAY = 86400
+
+
+@pytest.fixture(scope='module')
+def retention():
+    return load_library_module('report_retention')
+
+
+@pytest.fixture
+def report_dir(tmp_path):
+    """Reports tree with daily files aged 1 and 40 days and a 100 day old weekly file"""
+    now = time.time()
+    files = {
+        'daily/2024-06-01/consolidated_compliance_1.html': 40,
+        'daily/2024-06-01/sw1_compliance_1.json': 40,
+        'daily/2024-07-10/consolidated_compliance_2.html': 1,
+        'weekly/2024-03-01/consolidated_compliance_3.html': 100
+    }
+    for name, age_days in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+        os.utime(path, (now - age_days * DAY, now - age_days * DAY))
+    return tmp_path, now
+
+
+class TestScanExpired:
+
+    def test_groups_expired_files_by_report_date(self, retention, report_dir):
+        root, now = report_dir
+        expired, dirs = retention.scan_expired(str(root / 'daily'), now - 30 * DAY)
+
+        assert sorted(expired) == ['2024-06-01']
+        assert sorted(arcname for _, arcname, _ in expired['2024-06-01']) == [
+            os.path.join('2024-06-01', 'consolidated_compliance_1.html'),
+            os.path.join('2024-06-01', 'sw1_compliance_1.json')
+        ]
+        assert sorted(os.path.basename(d) for d in dirs) == ['2024-06-01', '2024-07-10']
+
+    def test_nothing_expired(self, retention, report_dir):
+        root, now = report_dir
+        expired, _ = retention.scan_expired(str(root / 'daily'), now - 90 * DAY)
+        assert expired == {}
+
+
+class TestApplyRetention:
+
+    def test_removes_only_expired(self, retention, report_dir):
+        root, now = report_dir
+        result = retention.apply_retention(str(root), {'daily': 30, 'weekly': 84}, now=now)
+
+        assert result['removed_files'] == 3
+        assert result['summary']['daily']['files'] == 2
+        assert not (root / 'daily' / '2024-06-01').exists()
+        assert (root / 'daily' / '2024-07-10' / 'consolidated_compliance_2.html').exists()
+        assert not (root / 'weekly' / '2024-03-01').exists()
+
+    def test_dry_run_keeps_files(self, retention, report_dir):
+        root, now = report_dir
+        result = retention.apply_retention(str(root), {'daily': 30}, dry_run=True, now=now)
+
+        assert result['removed_files'] == 2
+        assert (root / 'daily' / '2024-06-01' / 'sw1_compliance_1.json').exists()
+
+    def test_zero_days_keeps_everything(self, retention, report_dir):
+        root, now = report_dir
+        result = retention.apply_retention(str(root), {'daily': 0, 'weekly': 0}, now=now)
+        assert result['removed_files'] == 0
+
+    def test_archive_per_report_date(self, retention, report_dir):
+        root, now = report_dir
+        result = retention.apply_retention(str(root), {'daily': 30}, archive=True, now=now)
+
+        archive, = result['archives']
+        assert archive['files'] == 2
+        assert archive['path'] == str(root / 'archive' / 'daily' / '2024-06-01.tar.gz')
+        with tarfile.open(archive['path']) as tar:
+            assert sorted(tar.getnames()) == [
+                '2024-06-01/consolidated_compliance_1.html',
+                '2024-06-01/sw1_compliance_1.json'
+            ]
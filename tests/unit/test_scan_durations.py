@@ -0,0 +1,133 @@
+"""Tests for callback_plugins/scan_durations.py"""
+
+import json
+import os
+
+import pytest
+
+from conftest import load_library_module
+
+TASKS_DIR = '/project/roles/compliance_check/tasks'
+
+
+class Role:
+    def __init__(self, name):
+        self.name = name
+
+    def get_name(self):
+        return self.name
+
+
+class Task:
+    def __init__(self, uuid, role, path):
+        self._uuid = uuid
+        self._role = role
+        self.path = path
+
+    def get_path(self):
+        return self.path
+
+
+class Host:
+    def __init__(self, name):
+        self.name = name
+
+    def get_name(self):
+        return self.name
+
+
+class Result:
+    def __init__(self, host, task):
+        self._host = host
+        self._task = task
+
+
+class Playbook:
+    def __init__(self, basedir):
+        self._basedir = basedir
+
+
+@pytest.fixture(scope='module')
+def scan_durations():
+    return load_library_module('scan_durations', 'callback_plugins')
+
+
+@pytest.fixture
+def callback(scan_durations, tmp_path):
+    plugin = scan_durations.CallbackModule()
+    plugin.v2_playbook_on_start(Playbook(str(tmp_path)))
+    return plugin
+
+
+@pytest.fixture
+def clock(monkeypatch, scan_durations):
+    now = [0.0]
+    monkeypatch.setattr(scan_durations.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def run_task(callback, clock, host, task, seconds, outcome='ok'):
+    callback.v2_runner_on_start(host, task)
+    clock[0] += seconds
+    result = Result(host, task)
+    if outcome == 'ok':
+        callback.v2_runner_on_ok(result)
+    elif outcome == 'skipped':
+        callback.v2_runner_on_skipped(result)
+    else:
+        callback.v2_runner_on_failed(result, ignore_errors=outcome == 'ignored')
+
+
+def read_samples(path):
+    samples = {}
+    for name in os.listdir(path):
+        with open(os.path.join(path, name)) as f:
+            samples[name[:-5]] = json.load(f)['duration']
+    return samples
+
+
+class TestScanDurations:
+
+    def test_times_each_host_separately(self, callback, clock, tmp_path):
+        role = Role('compliance_check')
+        fetch = Task('fetch', role, f'{TASKS_DIR}/acquire_config.yml:13')
+        evaluate = Task('evaluate', role, f'{TASKS_DIR}/evaluate_rule_set.yml:13')
+        other = Task('other', Role('backup'), '/project/roles/backup/tasks/main.yml:5')
+        sw1, sw2 = Host('sw1'), Host('sw2')
+
+        run_task(callback, clock, sw1, fetch, 5)
+        run_task(callback, clock, sw2, fetch, 30)
+        run_task(callback, clock, sw1, other, 100)
+        run_task(callback, clock, sw1, evaluate, 1)
+        run_task(callback, clock, sw2, evaluate, 2, outcome='ignored')
+        callback.v2_playbook_on_stats(None)
+
+        assert read_samples(tmp_path / 'logs' / 'scan_durations') == {'sw1': 6.0, 'sw2': 32.0}
+
+    def test_verification_run_not_recorded(self, callback, clock, tmp_path):
+        scan, verify = Role('compliance_check'), Role('compliance_check')
+        host = Host('sw1')
+
+        run_task(callback, clock, host, Task('fetch', scan, f'{TASKS_DIR}/acquire_config.yml:13'), 10)
+        run_task(callback, clock, host, Task('evaluate', scan, f'{TASKS_DIR}/evaluate_rule_set.yml:13'), 2)
+        run_task(callback, clock, host, Task('include', verify, f'{TASKS_DIR}/main.yml:17'), 0, 'skipped')
+        run_task(callback, clock, host, Task('evaluate-2', verify, f'{TASKS_DIR}/evaluate_rule_set.yml:13'), 1)
+        callback.v2_playbook_on_stats(None)
+
+        assert read_samples(tmp_path / 'logs' / 'scan_durations') == {'sw1': 12.0}
+
+    def test_failed_host_not_recorded(self, callback, clock, tmp_path):
+        role = Role('compliance_check')
+        host = Host('sw1')
+        run_task(callback, clock, host, Task('fetch', role, f'{TASKS_DIR}/acquire_config.yml:13'), 10, 'failed')
+        callback.v2_playbook_on_stats(None)
+
+        assert not (tmp_path / 'logs' / 'scan_durations').exists()
+
+    def test_duration_dir_option(self, callback, clock, tmp_path):
+        callback.set_option('duration_dir', str(tmp_path / 'slots'))
+        run_task(callback, clock, Host('sw1'),
+                 Task('fetch', Role('compliance_check'), f'{TASKS_DIR}/acquire_config.yml:13'), 4)
+        callback.v2_playbook_on_stats(None)
+
+        assert read_samples(tmp_path / 'slots') == {'sw1': 4.0}
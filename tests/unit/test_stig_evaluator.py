@@ -0,0 +1,208 @@
+"""Tests for module_utils/stig_evaluator.py"""
+
+import json
+import re
+
+import pytest
+
+from stig_evaluator import (
+    CompactResults, MappedConfig, RuleSetEvaluator, derive_command_output, load_rule_set, merge_results
+)
+from stig_filters import FilterModule
+
+
+FILTERS = FilterModule()
+
+
+def baseline_result(check, output):
+    """
+    (compliant, status, details) the per-check tasks (execute_check.yml)
+    produced for a check and its command output.
+    """
+    if check['check_type'] == 'present':
+        presence = FILTERS.check_config_present(output, check.get('expected_config', []))
+        compliant = presence['compliant']
+        if check.get('check_regex'):
+            compliant = compliant and re.search(check['check_regex'], output) is not None
+        details = ('All required configurations found' if presence['compliant']
+                   else 'Missing configurations: ' + ', '.join(presence['missing']))
+        return compliant, 'Compliant' if presence['compliant'] else 'Non-Compliant', details
+
+    if check['check_type'] == 'absent':
+        absence = FILTERS.check_config_absent(output, check.get('prohibited_config', []))
+        details = ('No prohibited configurations found' if absence['compliant']
+                   else 'Violations found: ' + ', '.join(absence['violations']))
+        return absence['compliant'], 'Compliant' if absence['compliant'] else 'Non-Compliant', details
+
+    compliant = re.search(check['check_regex'], output) is not None
+    details = 'Pattern matched' if compliant else 'Pattern not found: ' + check['check_regex']
+    return compliant, 'Compliant' if compliant else 'Non-Compliant', details
+
+
+# Output of each show command on a device running conftest.RUNNING_CONFIG
+DEVICE_OUTPUTS = {
+    'show running-config | section aaa':
+        'aaa new-model\naaa authentication login default group tacacs+ local',
+    'show running-config | include ip http': 'ip http server',
+    'show running-config | include service pad': 'no service pad',
+    'show running-config | section line vty': 'line vty 0 4\n exec-timeout 30 0\n transport input ssh',
+    'show ip ssh': 'SSH Enabled - version 2.0\nAuthentication timeout: 120 secs'
+}
+
+
+class TestDeriveCommandOutput:
+
+    @pytest.mark.parametrize('command', [
+        'show running-config | section aaa',
+        'show running-config | include ip http',
+        'show running-config | include service pad',
+        'show running-config | section line vty'
+    ])
+    def test_matches_device_output(self, running_config, command):
+        assert derive_command_output(command, running_config) == DEVICE_OUTPUTS[command]
+
+    def test_full_running_config(self, running_config):
+        assert derive_command_output('show running-config', running_config) == running_config
+
+    def test_device_only_command(self, running_config):
+        assert derive_command_output('show ip ssh', running_config) is None
+
+    def test_mapped_config(self, tmp_path, checks, running_config):
+        path = tmp_path / 'test-sw01_running.cfg'
+        path.write_text(running_config)
+        with MappedConfig(str(path)) as mapped:
+            derived = derive_command_output('show running-config | section line vty', mapped)
+            results = RuleSetEvaluator(checks[:-1]).evaluate(mapped)
+        assert derived == DEVICE_OUTPUTS['show running-config | section line vty']
+        assert results == RuleSetEvaluator(checks[:-1]).evaluate(running_config)
+
+class TestEvaluationParity:
+
+    def test_matches_per_check_tasks(self, checks, running_config):
+        evaluator = RuleSetEvaluator(checks)
+        results = evaluator.evaluate(running_config, {'show ip ssh': DEVICE_OUTPUTS['show ip ssh']})
+
+        assert [r['stig_id'] for r in results] == [c['stig_id'] for c in checks]
+        for check, result in zip(checks, results):
+            output = DEVICE_OUTPUTS.get(check['check_command'], running_config)
+            compliant, status, details = baseline_result(check, output)
+            assert result['compliant'] == compliant, check['stig_id']
+            assert result['status'] == status, check['stig_id']
+            assert result['details'] == details, check['stig_id']
+            assert result['current_config'] == output
+            assert result['fix_commands'] == check['fix_commands']
+
+    def test_derived_outputs_match_device_outputs(self, checks, running_config):
+        evaluator = RuleSetEvaluator(checks)
+        derived = evaluator.evaluate(running_config, {'show ip ssh': DEVICE_OUTPUTS['show ip ssh']})
+        outputs = dict(DEVICE_OUTPUTS)
+        outputs['show running-config'] = running_config
+        from_device = evaluator.evaluate(None, outputs)
+        assert derived == from_device
+
+    def test_failing_regex_is_non_compliant(self, checks, running_config):
+        check = dict(checks[4], check_regex=r'exec-timeout\s+5\s')
+        result, = RuleSetEvaluator([check]).evaluate(running_config)
+        assert not result['compliant']
+        assert result['status'] == 'Non-Compliant'
+        assert result['details'] == r'Pattern not found: exec-timeout\s+5\s'
+
+    def test_failed_command_is_error(self, checks, running_config):
+        results = RuleSetEvaluator(checks).evaluate(running_config, errors={'show ip ssh': 'command timed out'})
+        result = results[-1]
+
+        assert result['stig_id'] == 'CISC-ND-000400'
+        assert result['status'] == 'Error'
+        assert not result['compliant']
+        assert result['details'] == 'Check execution failed: command timed out'
+        assert RuleSetEvaluator.summarize(results)['errors'] == 1
+
+    def test_category_order(self, checks):
+        evaluator = RuleSetEvaluator(checks, ['services', 'aaa'])
+        assert [rule.stig_id for rule in evaluator.rules] == [
+            'CISC-ND-000100', 'CISC-ND-000110', 'CISC-ND-000010', 'CISC-ND-000020'
+        ]
+
+
+class TestLoadRuleSet:
+
+    def test_cached_until_file_changes(self, tmp_path, checks):
+        path = str(tmp_path / 'rule_set.json')
+        RuleSetEvaluator(checks).save(path)
+
+        first = load_rule_set(path)
+        assert load_rule_set(path) is first
+
+        RuleSetEvaluator(checks[:2]).save(path)
+        reloaded = load_rule_set(path)
+        assert reloaded is not first
+        assert len(reloaded) == 2
+
+
+class TestReevaluation:
+
+    def test_offline_subset(self, checks):
+        offline, device_only = RuleSetEvaluator(checks).offline_subset()
+        assert device_only == ['CISC-ND-000400']
+        assert len(offline) == len(checks) - 1
+
+    def test_merge_replaces_drops_and_appends(self):
+        stored = [{'stig_id': 'A', 'status': 'old'}, {'stig_id': 'B'}, {'stig_id': 'C'}]
+        updated = [{'stig_id': 'D'}, {'stig_id': 'A', 'status': 'new'}]
+
+        merged = merge_results(stored, updated, ['B'])
+
+        assert merged == [{'stig_id': 'A', 'status': 'new'}, {'stig_id': 'C'}, {'stig_id': 'D'}]
+
+
+class TestCompactResults:
+
+    def test_round_trip(self, checks, running_config):
+        evaluator = RuleSetEvaluator(checks)
+        compact = evaluator.evaluate_compact(running_config, errors={'show ip ssh': 'timeout'})
+
+        restored = CompactResults.from_dict(json.loads(json.dumps(compact.to_dict())))
+
+        assert restored.fingerprint == compact.fingerprint
+        assert [r.to_list() for r in restored.records] == [r.to_list() for r in compact.records]
+        assert evaluator.expand(restored) == evaluator.expand(compact)
+        assert evaluator.expand(compact.to_dict()) == evaluator.expand(compact)
+
+    def test_outputs_stored_once(self, checks, running_config):
+        compact = RuleSetEvaluator(checks).evaluate_compact(running_config)
+        assert len(compact.outputs) == len(set(compact.outputs))
+
+    def test_summary_matches_expanded(self, checks, running_config):
+        evaluator = RuleSetEvaluator(checks)
+        compact = evaluator.evaluate_compact(running_config, {'show ip ssh': DEVICE_OUTPUTS['show ip ssh']})
+        assert compact.summarize() == RuleSetEvaluator.summarize(evaluator.expand(compact))
+
+    def test_unsupported_version(self):
+        with pytest.raises(ValueError):
+            CompactResults.from_dict({'format_version': 99})
+
+
+class TestFingerprint:
+
+    def test_stable_across_save_and_load(self, tmp_path, checks):
+        evaluator = RuleSetEvaluator(checks)
+        path = str(tmp_path / 'rule_set.json')
+        evaluator.save(path)
+        assert RuleSetEvaluator.load(path).fingerprint == evaluator.fingerprint
+
+    def test_independent_of_key_order(self, checks):
+        reordered = [dict(reversed(list(check.items()))) for check in checks]
+        assert RuleSetEvaluator(reordered).fingerprint == RuleSetEvaluator(checks).fingerprint
+
+    def test_changes_with_rule_order(self, checks):
+        assert RuleSetEvaluator(checks[::-1]).fingerprint != RuleSetEvaluator(checks).fingerprint
+
+    def test_changes_with_check_content(self, checks):
+        changed = [dict(checks[0], expected_config=['aaa new-model'])] + checks[1:]
+        assert RuleSetEvaluator(changed).fingerprint != RuleSetEvaluator(checks).fingerprint
+
+    def test_expand_rejects_other_rule_set(self, checks, running_config):
+        compact = RuleSetEvaluator(checks).evaluate_compact(running_config)
+        changed = RuleSetEvaluator([dict(checks[0], fix_commands=['aaa new-model', 'end'])] + checks[1:])
+        with pytest.raises(ValueError, match='different rule set'):
+            changed.expand(compact)
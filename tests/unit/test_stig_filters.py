@@ -0,0 +1,94 @@
+"""Tests for filter_plugins/stig_filters.py"""
+
+import io
+
+import pytest
+
+from stig_evaluator import RuleSetEvaluator
+from stig_filters import FilterModule
+
+
+FILTERS = FilterModule()
+
+CURRENT = """\
+hostname sw1
+!
+interface GigabitEthernet1/0/1
+ description uplink
+ shutdown
+interface GigabitEthernet1/0/2
+ description access
+ip http server
+"""
+
+DESIRED = """\
+hostname sw1
+interface GigabitEthernet1/0/1
+ description   uplink
+interface GigabitEthernet1/0/2
+ description access
+ shutdown
+service password-encryption
+"""
+
+
+class TestConfigDiff:
+
+    def test_moved_line_keeps_parent(self):
+        diff = FILTERS.config_diff(CURRENT, DESIRED)
+
+        assert diff['add'] == [
+            {'parents': ['interface GigabitEthernet1/0/2'], 'line': 'shutdown'},
+            {'parents': [], 'line': 'service password-encryption'}
+        ]
+        assert diff['remove'] == [
+            {'parents': ['interface GigabitEthernet1/0/1'], 'line': 'shutdown'},
+            {'parents': [], 'line': 'ip http server'}
+        ]
+
+    def test_unchanged_counted_not_listed(self):
+        diff = FILTERS.config_diff(CURRENT, DESIRED)
+        assert 'unchanged' not in diff
+        assert diff['summary'] == {'add': 2, 'remove': 2, 'unchanged': 5}
+
+    def test_include_unchanged(self):
+        diff = FILTERS.config_diff(CURRENT, DESIRED, include_unchanged=True)
+        assert diff['unchanged'][:3] == [
+            {'parents': [], 'line': 'hostname sw1'},
+            {'parents': [], 'line': 'interface GigabitEthernet1/0/1'},
+            {'parents': ['interface GigabitEthernet1/0/1'], 'line': 'description uplink'}
+        ]
+        assert len(diff['unchanged']) == diff['summary']['unchanged']
+
+    def test_file_and_line_inputs(self):
+        expected = FILTERS.config_diff(CURRENT, DESIRED)
+        assert FILTERS.config_diff(io.StringIO(CURRENT), DESIRED.splitlines()) == expected
+
+    def test_identical(self):
+        diff = FILTERS.config_diff(CURRENT, CURRENT)
+        assert diff['add'] == [] and diff['remove'] == []
+        assert diff['summary']['unchanged'] == 7
+
+
+class TestDeviceResults:
+
+    def test_expands_compact_records(self, tmp_path, checks, running_config):
+        path = str(tmp_path / 'rule_set.json')
+        evaluator = RuleSetEvaluator(checks)
+        evaluator.save(path)
+        compact = evaluator.evaluate_compact(running_config).to_dict()
+
+        device = {'records': compact, 'rule_set': path, 'summary': {}}
+        assert FILTERS.device_results(device) == evaluator.expand(compact)
+
+    def test_full_results_unchanged(self):
+        results = [{'stig_id': 'CISC-ND-000010', 'compliant': True}]
+        assert FILTERS.device_results({'results': results, 'summary': {}}) is results
+
+    def test_changed_rule_set_fails(self, tmp_path, checks, running_config):
+        path = str(tmp_path / 'rule_set.json')
+        compact = RuleSetEvaluator(checks).evaluate_compact(running_config).to_dict()
+        RuleSetEvaluator(checks[1:]).save(path)
+
+        with pytest.raises(ValueError, match='re-run the compliance check'):
+            FILTERS.device_results({'records': compact, 'rule_set': path})
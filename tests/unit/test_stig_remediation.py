@@ -0,0 +1,118 @@
+"""Tests for module_utils/stig_remediation.py"""
+
+from stig_remediation import RemediationPlan, merge_push_blocks, render_commands
+
+
+class TestRenderCommands:
+
+    def test_global_lines(self):
+        blocks = [
+            {'parents': [], 'lines': ['aaa new-model']},
+            {'parents': [], 'lines': ['service password-encryption', 'no ip http server']}
+        ]
+        assert render_commands(blocks) == ['aaa new-model', 'service password-encryption', 'no ip http server']
+
+    def test_parents_emitted_once_per_run(self):
+        blocks = [
+            {'parents': ['line vty 0 4'], 'lines': ['exec-timeout 10 0']},
+            {'parents': ['line vty 0 4'], 'lines': ['transport input ssh']}
+        ]
+        assert render_commands(blocks) == ['line vty 0 4', ' exec-timeout 10 0', ' transport input ssh']
+
+    def test_same_line_under_different_parents_kept(self):
+        blocks = [
+            {'parents': ['line con 0'], 'lines': ['exec-timeout 10 0']},
+            {'parents': ['line vty 0 4'], 'lines': ['exec-timeout 10 0']}
+        ]
+        assert render_commands(blocks) == [
+            'line con 0', ' exec-timeout 10 0',
+            'line vty 0 4', ' exec-timeout 10 0'
+        ]
+
+    def test_nested_parents_share_prefix(self):
+        blocks = [
+            {'parents': ['policy-map CoPP', 'class CLASS-A'], 'lines': ['police 8000']},
+            {'parents': ['policy-map CoPP', 'class CLASS-B'], 'lines': ['police 16000']},
+            {'parents': [], 'lines': ['logging buffered 64000']}
+        ]
+        assert render_commands(blocks) == [
+            'policy-map CoPP', ' class CLASS-A', '  police 8000',
+            ' class CLASS-B', '  police 16000',
+            'logging buffered 64000'
+        ]
+
+    def test_empty(self):
+        assert render_commands([]) == []
+
+
+class TestMergePushBlocks:
+
+    def test_consecutive_global_blocks_share_one_push(self):
+        blocks = [
+            {'parents': [], 'lines': ['aaa new-model'], 'stig_ids': ['CISC-ND-000010']},
+            {'parents': [], 'lines': ['no ip http server'], 'stig_ids': ['CISC-ND-000100']},
+            {'parents': ['line vty 0 4'], 'lines': ['exec-timeout 10 0'], 'stig_ids': ['CISC-ND-000210']},
+            {'parents': ['line vty 0 4'], 'lines': ['exec-timeout 10 0', 'transport input ssh'],
+             'stig_ids': ['CISC-ND-000200']},
+            {'parents': ['line con 0'], 'lines': ['exec-timeout 10 0'], 'stig_ids': ['CISC-ND-000210']},
+            {'parents': [], 'lines': ['logging buffered 64000'], 'stig_ids': ['CISC-ND-000300']}
+        ]
+
+        assert merge_push_blocks(blocks) == [
+            {'parents': [], 'lines': ['aaa new-model', 'no ip http server'],
+             'stig_ids': ['CISC-ND-000010', 'CISC-ND-000100']},
+            {'parents': ['line vty 0 4'], 'lines': ['exec-timeout 10 0', 'transport input ssh'],
+             'stig_ids': ['CISC-ND-000210', 'CISC-ND-000200']},
+            {'parents': ['line con 0'], 'lines': ['exec-timeout 10 0'], 'stig_ids': ['CISC-ND-000210']},
+            {'parents': [], 'lines': ['logging buffered 64000'], 'stig_ids': ['CISC-ND-000300']}
+        ]
+
+    def test_renders_like_the_plan(self):
+        blocks = [
+            {'parents': [], 'lines': ['aaa new-model']},
+            {'parents': [], 'lines': ['service password-encryption']},
+            {'parents': ['line vty 0 4'], 'lines': ['transport input ssh']}
+        ]
+        assert render_commands(merge_push_blocks(blocks)) == render_commands(blocks)
+
+
+class TestRemediationPlan:
+
+    def test_skips_present_and_collapses_duplicates(self):
+        plan = RemediationPlan()
+        plan.add_device('sw1', [
+            ('CISC-ND-000020', 'CAT_II', ['line vty 0 4', ' exec-timeout 10 0']),
+            ('CISC-ND-000010', 'CAT_I', ['aaa new-model', 'service password-encryption']),
+            ('CISC-ND-000030', 'CAT_II', ['line vty 0 4', ' exec-timeout 10 0', ' transport input ssh'])
+        ], config_lines=['hostname sw1', 'service password-encryption', 'line vty 0 4', ' transport input ssh'])
+
+        device = plan.devices['sw1']
+        assert plan.device_commands('sw1') == ['aaa new-model', 'line vty 0 4', ' exec-timeout 10 0']
+        assert device['stig_ids'] == ['CISC-ND-000010', 'CISC-ND-000020', 'CISC-ND-000030']
+        assert device['already_present'] == 2
+        assert device['duplicates_collapsed'] == 1
+
+    def test_unverified_and_missing_fixes(self):
+        plan = RemediationPlan()
+        plan.add_device('sw1', [
+            ('CISC-ND-000010', 'CAT_I', ['aaa new-model']),
+            ('CISC-ND-000400', 'CAT_I', [])
+        ], unverified={'CISC-ND-000010'})
+
+        summary = plan.summary()
+        assert plan.devices['sw1']['unverified'] == ['CISC-ND-000010']
+        assert summary['unverified'] == 1
+        assert summary['rules_without_fix_commands'] == ['CISC-ND-000400']
+
+    def test_blocks_shared_between_devices(self, tmp_path):
+        findings = [('CISC-ND-000010', 'CAT_I', ['aaa new-model'])]
+        plan = RemediationPlan(rule_set='abc')
+        plan.add_device('sw1', findings)
+        plan.add_device('sw2', findings)
+        assert len(plan.blocks) == 1
+
+        path = str(tmp_path / 'plan.json')
+        plan.save(path)
+        loaded = RemediationPlan.load(path)
+        assert loaded.rule_set == 'abc'
+        assert loaded.device_commands('sw2') == ['aaa new-model']